@@ -2,6 +2,7 @@
 """Software Archaeology - Codebase Time Machine"""
 
 import sys
+import json
 import argparse
 from pathlib import Path
 from src.repo_loader import RepoLoader
@@ -9,33 +10,186 @@ from src.commit_walker import CommitWalker
 from src.metrics_calculator import MetricsCalculator
 from src.insight_engine import InsightEngine
 from src.report_generator import ReportGenerator
+from src.columnar_store import ColumnarExporter
+from src.ingest_filter import IngestFilter, DEFAULT_MAX_BLOB_SIZE
+from src.ref_index import RefIndex, extract_ref_store
+from src.commit_search import CommitSearch
+from src.analysis import Analysis
+
+
+def export_main(argv):
+    """Export an existing analysis database to columnar files"""
+    parser = argparse.ArgumentParser(prog='archaeology.py export',
+                                     description='Export analysis data as partitioned Arrow/Parquet files')
+    parser.add_argument('--db', default='data/repo_data.db', help='Analysis database to export')
+    parser.add_argument('--output', default='data/columnar', help='Output directory')
+    parser.add_argument('--format', choices=['arrow', 'parquet'], default='arrow',
+                        help='arrow: memory-mappable, zero-copy loads; parquet: smaller, compressed')
+    args = parser.parse_args(argv)
+
+    print(f"Exporting {args.db} to {args.output} ({args.format})")
+    manifest = ColumnarExporter(args.db, args.output, args.format).export()
+    for table, info in manifest['tables'].items():
+        print(f"   {table}: {info['rows']} rows in {len(info['partitions'])} partition(s)")
+
+    print(f"\n[SUCCESS] Export complete: {args.output}")
+
+
+def branch_main(argv):
+    """Report on one ref of a multi-ref analysis database without re-extracting"""
+    parser = argparse.ArgumentParser(prog='archaeology.py branch',
+                                     description='Analyze one ref recorded by an --all-refs/--refs run')
+    parser.add_argument('ref', help='Full or short ref name, e.g. main or refs/remotes/origin/release')
+    parser.add_argument('--db', default='data/repo_data.db', help='Multi-ref analysis database')
+    parser.add_argument('--output', help='Output file path (default: output/report_<ref>.html)')
+    parser.add_argument('--workers', type=int,
+                        help='Compute metrics concurrently with this many workers')
+    args = parser.parse_args(argv)
+
+    print(f"[1/4] Selecting commits reachable from {args.ref}...")
+    db_path = extract_ref_store(args.db, args.ref)
+
+    print("[2/4] Computing metrics...")
+    metrics = MetricsCalculator(db_path).compute_all(workers=args.workers)
+
+    print("[3/4] Generating insights...")
+    insights = InsightEngine(metrics).analyze()
+
+    print("[4/4] Creating report...")
+    output = args.output or f"output/report_{args.ref.replace('/', '_')}.html"
+    ReportGenerator(metrics, insights).generate(output)
+
+    print(f"\n[SUCCESS] Analysis complete: {output}")
+
+
+def search_main(argv):
+    """Search commit messages in an existing analysis database"""
+    parser = argparse.ArgumentParser(prog='archaeology.py search',
+                                     description='Find commits by message, with the files they touched')
+    parser.add_argument('query', help='Keywords, "quoted phrases", prefix* terms, OR (SQLite FTS5 syntax)')
+    parser.add_argument('--db', default='data/repo_data.db', help='Analysis database to search')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum number of commits to list')
+    args = parser.parse_args(argv)
+
+    search = CommitSearch(args.db)
+    summary = search.summary(args.query)
+    print(f"{summary['commits']} matching commits touching {summary['files_touched']} files "
+          f"({summary['churn']} lines changed)")
+    if not summary['commits']:
+        return
+
+    print(f"Period: {summary['first_date'][:10]} to {summary['last_date'][:10]}")
+    print("\nMost touched files:")
+    for f in summary['top_files']:
+        print(f"   {f['commits']:>5} commits  {f['churn']:>8} lines  {f['file']}")
+
+    print("\nBest matches:")
+    for commit in search.search(args.query, limit=args.limit):
+        print(f"   {commit['sha'][:10]}  {commit['date'][:10]}  {commit['author']}: "
+              f"{commit['message'].splitlines()[0]}")
+        print(f"      {len(commit['files'])} files, {commit['churn']} lines")
+
+
+def metadata_report(db_path):
+    """Print and save the metrics a walk-only pass supports.
+
+    Saved to their own file so a full run's data/metrics.json is kept.
+    """
+    analysis = Analysis(db_path)
+    metrics = {name: analysis[name] for name in MetricsCalculator.COMMIT_LEVEL}
+    with open('data/metadata.json', 'w') as f:
+        json.dump(metrics, f, indent=2)
+
+    summary = metrics['commit_summary']
+    print(f"\n{summary['commits']} commits by {summary['authors']} authors "
+          f"({summary['merges']} merges)")
+    if summary['commits']:
+        print(f"Period: {summary['first_date'][:10]} to {summary['last_date'][:10]}")
+        busiest = max(metrics['commit_density'], key=lambda d: d['density'])
+        print(f"Busiest 7 days: around {busiest['date']} ({busiest['density']:.1f} commits/day)")
+        print("Top authors:")
+        for author in summary['top_authors'][:5]:
+            print(f"   {author['commits']:>6}  {author['author']}")
+
+    print("\n[SUCCESS] Commit metadata saved: data/metadata.json")
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'search':
+        return search_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        return export_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'branch':
+        return branch_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(description='Analyze Git repository evolution')
     parser.add_argument('repo_path', help='Path to Git repository or URL')
     parser.add_argument('--output', default='output/report.html', help='Output file path')
     parser.add_argument('--sample', type=int, help='Sample every Nth commit (for large repos)')
+    parser.add_argument('--metadata-only', action='store_true',
+                        help='Only walk the history (no diffs) and report commit-level metrics')
+    parser.add_argument('--write-commit-graph', action='store_true',
+                        help="Run 'git commit-graph write --reachable' on the repository (local or "
+                             "cloned) before walking it")
+    parser.add_argument('--all-refs', action='store_true',
+                        help='Analyze every branch, remote branch and tag in one walk')
+    parser.add_argument('--refs', action='append', metavar='PATTERN',
+                        help='Analyze refs matching this glob, e.g. "release/*" (repeatable)')
+    parser.add_argument('--ignore', action='append', default=[], metavar='PATTERN',
+                        help='gitignore-style pattern of files to exclude (repeatable)')
+    parser.add_argument('--ignore-file', action='append', default=[], metavar='PATH',
+                        help='File of gitignore-style patterns to exclude (repeatable)')
+    parser.add_argument('--no-default-ignores', action='store_true',
+                        help='Keep lockfiles, vendored and minified files that are skipped by default')
+    parser.add_argument('--max-blob-size', type=int, default=DEFAULT_MAX_BLOB_SIZE, metavar='BYTES',
+                        help='Skip file versions larger than this (0 disables the limit)')
+    parser.add_argument('--approx-coupling', action='store_true',
+                        help='Approximate temporal coupling with MinHash/LSH (for very large repos)')
+    parser.add_argument('--coupling-similarity', type=float, default=0.3,
+                        help='Jaccard similarity threshold for approximate coupling candidates')
+    parser.add_argument('--coupling-error', type=float, default=0.1,
+                        help='Target standard error of approximate coupling estimates')
+    parser.add_argument('--workers', type=int,
+                        help='Compute metrics concurrently with this many workers')
+    parser.add_argument('--anomaly-granularity', choices=['day', 'week', 'month'], default='week',
+                        help='Period size for per-file/per-directory churn anomaly detection')
+    parser.add_argument('--split-data', action='store_true',
+                        help='Write chart data as gzipped JSON loaded on demand (for large repos)')
     args = parser.parse_args()
 
     print(f"[1/5] Loading repository: {args.repo_path}")
-    loader = RepoLoader(args.repo_path)
+    loader = RepoLoader(args.repo_path, write_commit_graph=args.write_commit_graph)
     repo = loader.load()
 
     print("[2/5] Extracting commit history...")
-    walker = CommitWalker(repo, sample_rate=args.sample)
+    ingest_filter = IngestFilter.for_repo(repo, patterns=args.ignore, ignore_files=args.ignore_file,
+                                          use_defaults=not args.no_default_ignores,
+                                          max_blob_size=args.max_blob_size)
+    ref_index = None
+    if args.all_refs or args.refs:
+        ref_index = RefIndex.resolve(repo, args.refs)
+        print(f"   Walking {ref_index.width} refs as one history")
+    walker = CommitWalker(repo, sample_rate=args.sample, ingest_filter=ingest_filter, ref_index=ref_index)
+    if args.metadata_only:
+        # Own store, so a full run's data/repo_data.db keeps its file changes
+        walker.db_path = Path('data/metadata.db')
+        return metadata_report(walker.extract_metadata())
     db_path = walker.extract_to_db()
 
     print("[3/5] Computing metrics...")
-    calculator = MetricsCalculator(db_path)
-    metrics = calculator.compute_all()
+    calculator = MetricsCalculator(db_path,
+                                   approximate_coupling=args.approx_coupling,
+                                   coupling_similarity=args.coupling_similarity,
+                                   coupling_error=args.coupling_error,
+                                   anomaly_granularity=args.anomaly_granularity)
+    metrics = calculator.compute_all(workers=args.workers)
 
     print("[4/5] Generating insights...")
     engine = InsightEngine(metrics)
     insights = engine.analyze()
 
     print("[5/5] Creating report...")
-    generator = ReportGenerator(metrics, insights)
+    generator = ReportGenerator(metrics, insights, split_data=args.split_data)
     generator.generate(args.output)
 
     print(f"\n[SUCCESS] Analysis complete: {args.output}")
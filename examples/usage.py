@@ -8,3 +8,13 @@
 
 # For large repositories, use sampling
 # python archaeology.py https://github.com/torvalds/linux --sample 10 --output linux_report.html
+
+# Programmatic use: metrics are computed lazily, only when first accessed
+#
+# from src.analysis import Analysis
+#
+# analysis = Analysis('data/repo_data.db')
+# for hotspot in analysis['hotspots'][:10]:     # never pays for coupling or density
+#     print(hotspot['file'], hotspot['score'])
+# print(analysis.insights(['risky_files']))
+# analysis.report('output/report.html')         # computes the rest on demand
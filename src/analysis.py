@@ -0,0 +1,63 @@
+"""Analysis - lazy, memoized access to metrics for programmatic use"""
+
+import json
+from collections.abc import Mapping
+from src.metrics_calculator import MetricsCalculator
+from src.insight_engine import InsightEngine
+from src.report_generator import ReportGenerator
+
+
+class Analysis(Mapping):
+    """Metrics over an analysis database, computed on first access.
+
+    Behaves like the dict returned by MetricsCalculator.compute_all(), so it
+    can be handed straight to InsightEngine or ReportGenerator; only the
+    metrics they actually read (and the shared intermediates those depend
+    on) are computed, each exactly once.
+
+        analysis = Analysis('data/repo_data.db')
+        analysis['hotspots'][:10]         # never touches coupling or density
+        analysis.insights(['risky_files'])
+    """
+
+    def __init__(self, db_path, **options):
+        self.calculator = MetricsCalculator(db_path, **options)
+
+    def __getitem__(self, name):
+        if name not in MetricsCalculator.METRICS:
+            raise KeyError(name)
+        return self.calculator.get(name)
+
+    def __iter__(self):
+        return iter(MetricsCalculator.METRICS)
+
+    def __len__(self):
+        return len(MetricsCalculator.METRICS)
+
+    def __getattr__(self, name):
+        if name in MetricsCalculator.METRICS:
+            return self.calculator.get(name)
+        raise AttributeError(name)
+
+    @property
+    def computed(self):
+        """Metrics and intermediates computed so far, in computation order"""
+        return self.calculator.computed()
+
+    @staticmethod
+    def dependencies(name):
+        """Intermediate results a metric is computed from"""
+        return list((MetricsCalculator.METRICS.get(name) or MetricsCalculator.INTERMEDIATES[name])[1])
+
+    def insights(self, names=None):
+        """Generate insights, computing only the metrics they read"""
+        return InsightEngine(self).analyze(names)
+
+    def report(self, output_path, split_data=False):
+        """Generate the full HTML report"""
+        ReportGenerator(self, self.insights(), split_data=split_data).generate(output_path)
+
+    def save(self, output_path='data/metrics.json'):
+        """Compute every metric and write them all as JSON"""
+        with open(output_path, 'w') as f:
+            json.dump(dict(self), f, indent=2)
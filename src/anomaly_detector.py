@@ -0,0 +1,124 @@
+"""Anomaly detector - streaming rolling median/MAD baselines for change series"""
+
+import bisect
+from collections import deque
+from datetime import datetime
+
+# Scales MAD to a standard deviation for normally distributed data
+MAD_SCALE = 1.4826
+
+PERIOD_FORMATS = {
+    'day': '%Y-%m-%d',
+    'week': '%Y-W%U',
+    'month': '%Y-%m'
+}
+
+
+def period_key(timestamp, granularity):
+    """Bucket a Unix timestamp into a sortable period label"""
+    return datetime.fromtimestamp(timestamp).strftime(PERIOD_FORMATS[granularity])
+
+
+class RollingBaseline:
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._sorted = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def push(self, value):
+        """Add a value, evicting the oldest once the window is full"""
+        if len(self._values) == self.window:
+            old = self._values.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+        self._values.append(value)
+        bisect.insort(self._sorted, value)
+
+    def median(self):
+        s = self._sorted
+        n = len(s)
+        if n % 2:
+            return s[n // 2]
+        return (s[n // 2 - 1] + s[n // 2]) / 2
+
+    def mad(self):
+        """Median absolute deviation, selected in O(log w) from the sorted window.
+
+        Deviations below the median, read right-to-left, and those above it,
+        read left-to-right, are two sorted runs; the MAD is their median.
+        """
+        s = self._sorted
+        n = len(s)
+        m = self.median()
+        split = bisect.bisect_left(s, m)
+        below = lambda i: m - s[split - 1 - i]
+        above = lambda j: s[split + j] - m
+
+        def kth(k):
+            left_len, right_len = split, n - split
+            lo, hi = max(0, k + 1 - right_len), min(k + 1, left_len)
+            while lo < hi:
+                i = (lo + hi) // 2
+                if below(i) < above(k - i):
+                    lo = i + 1
+                else:
+                    hi = i
+            j = k + 1 - lo
+            candidates = []
+            if lo > 0:
+                candidates.append(below(lo - 1))
+            if j > 0:
+                candidates.append(above(j - 1))
+            return max(candidates)
+
+        if n % 2:
+            return kth(n // 2)
+        return (kth(n // 2 - 1) + kth(n // 2)) / 2
+
+
+class AnomalyDetector:
+    def __init__(self, window=12, threshold=3.5, min_ratio=2.0, min_periods=4, min_scale=1.0):
+        """
+        window: number of preceding periods in each rolling baseline
+        threshold: robust z-score (value - median) / (1.4826 * MAD) to flag
+        min_ratio: a flagged value must also exceed min_ratio x the median
+        min_periods: periods needed before a series can be judged
+        min_scale: floor for the robust scale so flat baselines don't flag
+            every small uptick
+        """
+        self.window = window
+        self.threshold = threshold
+        self.min_ratio = min_ratio
+        self.min_periods = min_periods
+        self.min_scale = min_scale
+        self._series = {}
+
+    def update(self, key, period, value):
+        """Feed the next value of a series; return an anomaly dict or None.
+
+        Each value is judged against the window before it, then joins it, so
+        series can be fed as data arrives.
+        """
+        baseline = self._series.get(key)
+        if baseline is None:
+            baseline = self._series[key] = RollingBaseline(self.window)
+
+        anomaly = None
+        if len(baseline) >= self.min_periods:
+            median = baseline.median()
+            scale = max(MAD_SCALE * baseline.mad(), self.min_scale)
+            score = (value - median) / scale
+            if median > 0 and score > self.threshold and value > self.min_ratio * median:
+                anomaly = {
+                    'key': key,
+                    'period': period,
+                    'value': value,
+                    'baseline': median,
+                    'score': round(score, 1),
+                    'multiplier': round(value / median, 1)
+                }
+
+        baseline.push(value)
+        return anomaly
@@ -0,0 +1,205 @@
+"""Columnar store - Arrow/Parquet export of the analysis database"""
+
+import json
+import math
+import sqlite3
+from pathlib import Path
+from src import store_schema
+
+# Rows fetched from SQLite per record batch
+BATCH_ROWS = 100_000
+
+EXPORT_QUERIES = {
+    'commits': '''
+        SELECT sha, timestamp, author, message
+        FROM commits
+        ORDER BY timestamp
+    ''',
+    'file_changes': '''
+        SELECT c.sha AS commit_sha, fc.timestamp, fc.file_path, fc.lineage_id, l.lineage_path,
+               fc.lines_added, fc.lines_deleted
+        FROM file_changes fc
+        JOIN commits c ON fc.commit_id = c.id
+        JOIN lineage l ON fc.lineage_id = l.lineage_id
+        ORDER BY fc.timestamp
+    ''',
+    'file_metrics': '''
+        SELECT m.lineage_id, l.lineage_path, m.commits, m.churn, m.first_modified, m.last_modified
+        FROM (
+            SELECT lineage_id,
+                   COUNT(DISTINCT commit_id) AS commits,
+                   SUM(lines_added + lines_deleted) AS churn,
+                   MIN(timestamp) AS first_modified,
+                   MAX(timestamp) AS last_modified
+            FROM file_changes
+            GROUP BY lineage_id
+        ) m
+        JOIN lineage l ON m.lineage_id = l.lineage_id
+    '''
+}
+
+# Arrow type of every exported column, so batches share one schema even when
+# a batch holds only NULLs for a column (which pa.array would type as null)
+COLUMN_TYPES = {
+    'commits': {'sha': 'string', 'timestamp': 'int64', 'author': 'string', 'message': 'string'},
+    'file_changes': {'commit_sha': 'string', 'timestamp': 'int64', 'file_path': 'string', 'lineage_id': 'int64',
+                     'lineage_path': 'string', 'lines_added': 'int64', 'lines_deleted': 'int64'},
+    'file_metrics': {'lineage_id': 'int64', 'lineage_path': 'string', 'commits': 'int64', 'churn': 'int64',
+                     'first_modified': 'int64', 'last_modified': 'int64'}
+}
+
+# Tables split into year=YYYY partitions by their timestamp column
+PARTITIONED = {'commits', 'file_changes'}
+
+EXTENSIONS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Columnar export requires pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+class ColumnarExporter:
+    def __init__(self, db_path, output_dir, fmt='arrow'):
+        """
+        fmt: 'arrow' writes uncompressed Arrow IPC files that load back with
+            zero copies via memory mapping; 'parquet' writes smaller
+            compressed files that are decoded on load
+        """
+        if fmt not in EXTENSIONS:
+            raise ValueError(f"Unknown columnar format: {fmt}")
+        self.db_path = db_path
+        self.output_dir = Path(output_dir)
+        self.fmt = fmt
+
+    def export(self):
+        """Export all tables and write a manifest; returns the manifest"""
+        pa = _require_pyarrow()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path)
+        store_schema.migrate(conn)
+        total_commits = conn.execute('SELECT COUNT(*) FROM commits').fetchone()[0]
+
+        manifest = {'format': self.fmt, 'tables': {}}
+        for table, query in EXPORT_QUERIES.items():
+            print(f"   Exporting {table}...")
+            cursor = conn.execute(query)
+            batches = self._batches(pa, cursor, self._schema(pa, table))
+            if table == 'file_metrics':
+                batches = (self._with_scores(pa, batch, total_commits) for batch in batches)
+            manifest['tables'][table] = self._write_table(pa, table, batches)
+        conn.close()
+
+        with open(self.output_dir / 'manifest.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        return manifest
+
+    def _schema(self, pa, table):
+        return pa.schema([(name, getattr(pa, type_name)()) for name, type_name in COLUMN_TYPES[table].items()])
+
+    def _batches(self, pa, cursor, schema):
+        while True:
+            rows = cursor.fetchmany(BATCH_ROWS)
+            if not rows:
+                return
+            arrays = [pa.array(col, type=field.type) for col, field in zip(zip(*rows), schema)]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def _with_scores(self, pa, batch, total_commits):
+        """Add volatility and hotspot score columns, as in MetricsCalculator"""
+        commits = batch.column('commits').to_pylist()
+        churn = batch.column('churn').to_pylist()
+        volatility = [c / total_commits for c in commits]
+        score = [v * math.log(1 + ch) for v, ch in zip(volatility, churn)]
+        schema = batch.schema.append(pa.field('volatility', pa.float64())).append(
+            pa.field('hotspot_score', pa.float64()))
+        return pa.RecordBatch.from_arrays(
+            batch.columns + [pa.array(volatility, type=pa.float64()), pa.array(score, type=pa.float64())],
+            schema=schema
+        )
+
+    def _write_table(self, pa, table, batches):
+        """Write batches, one file per year partition for partitioned tables"""
+        import pyarrow.compute as pc
+        table_dir = self.output_dir / table
+        table_dir.mkdir(exist_ok=True)
+        partitions = {}
+        writer = None
+        current = None
+
+        for batch in batches:
+            if table in PARTITIONED:
+                # Rows arrive ordered by timestamp, so each year is contiguous
+                years = pc.year(pc.cast(batch.column('timestamp'), pa.timestamp('s')))
+                for year in pc.unique(years).to_pylist():
+                    part = batch.filter(pc.equal(years, year))
+                    if year != current:
+                        if writer:
+                            writer.close()
+                        current = year
+                        writer = self._open_writer(pa, table_dir / f'year={year}', part.schema)
+                        partitions[f'year={year}'] = 0
+                    writer.write_batch(part)
+                    partitions[f'year={year}'] += part.num_rows
+            else:
+                if writer is None:
+                    writer = self._open_writer(pa, table_dir, batch.schema)
+                    partitions[''] = 0
+                writer.write_batch(batch)
+                partitions[''] += batch.num_rows
+
+        if writer:
+            writer.close()
+
+        return {'partitions': partitions, 'rows': sum(partitions.values())}
+
+    def _open_writer(self, pa, directory, schema):
+        directory.mkdir(exist_ok=True)
+        path = directory / f'part-0{EXTENSIONS[self.fmt]}'
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(path, schema)
+        return pa.ipc.new_file(str(path), schema)
+
+
+class ColumnarStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'manifest.json') as f:
+            self.manifest = json.load(f)
+
+    def load_table(self, table, years=None, columns=None):
+        """Load a table as a pyarrow Table.
+
+        Arrow files are memory-mapped, so the returned columns reference the
+        mapped pages directly instead of copying them. years restricts
+        partitioned tables to those year partitions.
+        """
+        pa = _require_pyarrow()
+        fmt = self.manifest['format']
+        parts = []
+
+        for partition in sorted(self.manifest['tables'][table]['partitions']):
+            if years is not None and partition and int(partition.split('=')[1]) not in years:
+                continue
+            path = self.path / table / partition / f'part-0{EXTENSIONS[fmt]}'
+            if fmt == 'parquet':
+                import pyarrow.parquet as pq
+                parts.append(pq.read_table(path, columns=columns, memory_map=True))
+            else:
+                data = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+                parts.append(data.select(columns) if columns else data)
+
+        if not parts:
+            raise ValueError(f"No partitions selected for {table}")
+        return pa.concat_tables(parts)
+
+    def load_dataframe(self, table, years=None, columns=None):
+        """Load a table as a pandas DataFrame backed by the Arrow buffers"""
+        import pandas as pd
+        return self.load_table(table, years, columns).to_pandas(types_mapper=pd.ArrowDtype)
@@ -0,0 +1,181 @@
+"""Commit search - full-text queries over commit messages with per-file churn"""
+
+import re
+import sqlite3
+from collections import defaultdict
+from datetime import datetime
+from src import store_schema
+
+# FTS5 operators, left unquoted when a query's terms are quoted
+FTS_OPERATORS = ('OR', 'AND', 'NOT')
+
+# How FTS5 reports a query it can't parse; a bare "-" or ":" makes the
+# preceding word a column filter, hence "no such column"
+FTS_SYNTAX_ERRORS = ('fts5: syntax error', 'no such column', 'unterminated string')
+
+# Messages that mark a commit as a fix, as an FTS5 query
+FIX_QUERY = 'fix OR fixes OR fixed OR fixing OR bug OR bugs OR bugfix OR hotfix OR regression OR revert OR crash'
+
+
+def _fallback_pattern(query):
+    """Approximate an FTS5 query as a regex for SQLite builds without FTS5.
+
+    Supports what the fix query and typical searches use: terms (implicitly
+    AND'ed), "quoted phrases", prefix* terms, NOT before a term and OR
+    between groups.
+    """
+    alternatives = []
+    for group in re.split(r'\s+OR\s+', query.strip()):
+        lookaheads = ''
+        negate = False
+        for term in re.findall(r'"[^"]*"|\S+', group):
+            if term in ('AND', 'NOT'):
+                negate = term == 'NOT'
+                continue
+            prefix = term.endswith('*')
+            words = re.findall(r'\w+', term)
+            if not words:
+                continue
+            body = r'\W+'.join(re.escape(word) for word in words)
+            lookaheads += ('(?!' if negate else '(?=') + rf'.*\b{body}' + ('' if prefix else r'\b') + ')'
+            negate = False
+        if lookaheads:
+            alternatives.append(lookaheads)
+    return re.compile('|'.join(alternatives) or '(?!)', re.IGNORECASE | re.DOTALL)
+
+
+def _quote_terms(query):
+    """Quote each term of a query as an FTS5 phrase, keeping prefix stars,
+    "phrases" and OR/AND/NOT between two terms"""
+    tokens = re.findall(r'"[^"]*"\*?|\S+', query)
+    terms = []
+    for i, token in enumerate(tokens):
+        if token.startswith('"') and token.rstrip('*').endswith('"') and len(token.rstrip('*')) > 1:
+            terms.append(token)
+        elif token in FTS_OPERATORS and terms and terms[-1] not in FTS_OPERATORS and i < len(tokens) - 1:
+            terms.append(token)
+        else:
+            prefix = '*' if token.endswith('*') else ''
+            terms.append('"' + token.rstrip('*').replace('"', '') + '"' + prefix)
+    return ' '.join(terms)
+
+
+class CommitSearch:
+    """Keyword search over an analysis database.
+
+        search = CommitSearch('data/repo_data.db')
+        search.search('"INC-4821" OR hotfix')     # best matches, with files and churn
+        search.summary('regression')               # counts and the files they touched
+    """
+
+    def __init__(self, db_path=None, conn=None):
+        if conn is None:
+            conn = sqlite3.connect(db_path)
+            store_schema.migrate(conn)
+        self.conn = conn
+        self.full_text = store_schema.has_search_index(self.conn)
+        if not self.full_text:
+            self.conn.create_function('regexp', 2, self._regexp, deterministic=True)
+        self._patterns = {}
+
+    def _regexp(self, query, message):
+        pattern = self._patterns.get(query)
+        if pattern is None:
+            pattern = self._patterns[query] = _fallback_pattern(query)
+        return message is not None and pattern.search(message) is not None
+
+    def _matches(self, query):
+        """(sql, params) selecting (id, rank) of the commits matching query"""
+        if self.full_text:
+            return 'SELECT rowid AS id, rank FROM commits_fts WHERE commits_fts MATCH ?', [self._fts_query(query)]
+        return 'SELECT id, 0 AS rank FROM commits WHERE message REGEXP ?', [query]
+
+    def _fts_query(self, query):
+        """Return query, or its terms quoted as phrases if FTS5 can't parse it.
+
+        Probed against the search index alone, so schema problems elsewhere
+        aren't mistaken for query syntax (e.g. INC-4821 reads as a column
+        filter, while a missing commits column must still raise).
+        """
+        try:
+            self.conn.execute('SELECT rowid FROM commits_fts WHERE commits_fts MATCH ? LIMIT 1', [query]).fetchall()
+        except sqlite3.OperationalError as e:
+            if not str(e).startswith(FTS_SYNTAX_ERRORS):
+                raise
+            return _quote_terms(query)
+        return query
+
+    def commit_ids(self, query):
+        """Ids of every commit whose message matches query"""
+        sql, params = self._matches(query)
+        return [commit_id for commit_id, _ in self.conn.execute(sql, params)]
+
+    def search(self, query, limit=20):
+        """Best-matching commits with the files they touched and their churn"""
+        sql, params = self._matches(query)
+        rows = self.conn.execute(f'''
+            SELECT c.id, c.sha, c.timestamp, c.author, c.message
+            FROM ({sql}) m
+            JOIN commits c ON c.id = m.id
+            ORDER BY m.rank, c.timestamp DESC
+            LIMIT ?
+        ''', params + [limit]).fetchall()
+
+        files = defaultdict(list)
+        ids = [row[0] for row in rows]
+        if ids:
+            cursor = self.conn.execute(f'''
+                SELECT commit_id, file_path, lines_added, lines_deleted
+                FROM file_changes
+                WHERE commit_id IN ({','.join('?' * len(ids))})
+            ''', ids)
+            for commit_id, file_path, added, deleted in cursor:
+                files[commit_id].append({'file': file_path, 'lines_added': added, 'lines_deleted': deleted})
+
+        return [{
+            'sha': sha,
+            'date': datetime.fromtimestamp(timestamp).isoformat(),
+            'author': author,
+            'message': message,
+            'files': files[commit_id],
+            'churn': sum(f['lines_added'] + f['lines_deleted'] for f in files[commit_id])
+        } for commit_id, sha, timestamp, author, message in rows]
+
+    def file_counts(self, query):
+        """{lineage_id: (matching commits, churn)} over every matching commit"""
+        sql, params = self._matches(query)
+        rows = self.conn.execute(f'''
+            SELECT fc.commit_id, fc.lineage_id, fc.lines_added + fc.lines_deleted
+            FROM ({sql}) m
+            JOIN file_changes fc ON fc.commit_id = m.id
+        ''', params)
+
+        commits = defaultdict(set)
+        churn = defaultdict(int)
+        for commit_id, lineage_id, lines in rows:
+            commits[lineage_id].add(commit_id)
+            churn[lineage_id] += lines
+        return {lineage_id: (len(ids), churn[lineage_id]) for lineage_id, ids in commits.items()}
+
+    def summary(self, query, top=10):
+        """Aggregate churn of the matching commits and the files they touched most"""
+        sql, params = self._matches(query)
+        count, first, last = self.conn.execute(f'''
+            SELECT COUNT(*), MIN(c.timestamp), MAX(c.timestamp)
+            FROM ({sql}) m
+            JOIN commits c ON c.id = m.id
+        ''', params).fetchone()
+
+        names = dict(self.conn.execute('SELECT lineage_id, lineage_path FROM lineage'))
+        counts = self.file_counts(query)
+        ranked = sorted(counts.items(), key=lambda item: (-item[1][0], -item[1][1]))
+
+        return {
+            'commits': count,
+            'first_date': datetime.fromtimestamp(first).isoformat() if first else None,
+            'last_date': datetime.fromtimestamp(last).isoformat() if last else None,
+            'files_touched': len(counts),
+            'churn': sum(lines for _, lines in counts.values()),
+            'top_files': [{'file': names[lineage_id], 'commits': commits, 'churn': lines}
+                          for lineage_id, (commits, lines) in ranked[:top]]
+        }
@@ -4,79 +4,139 @@ import sqlite3
 import pygit2
 from pathlib import Path
 from datetime import datetime
+from src.lineage import LineageIndex
+from src.ingest_filter import IngestFilter
+from src import store_schema
 
 
 class CommitWalker:
-    def __init__(self, repo, sample_rate=None):
+    def __init__(self, repo, sample_rate=None, ingest_filter=None, ref_index=None):
         self.repo = repo
         self.sample_rate = sample_rate
+        # Walk every ref in ref_index at once instead of just HEAD
+        self.ref_index = ref_index
         self.db_path = Path('data/repo_data.db')
+        self.lineage = LineageIndex()
+        self.ingest_filter = ingest_filter or IngestFilter.for_repo(repo)
+        self.skipped = {'ignored': 0, 'oversized': 0}
 
     def extract_to_db(self):
-        """Walk commits and extract to SQLite database"""
+        """Walk commits and extract to SQLite database.
+
+        Runs in two passes over one store: extract_metadata() walks the
+        history without diffing and commits it, so commit-level metrics
+        can be read from the database (even while diffing continues), then
+        extract_diffs() diffs each stored commit.
+        """
+        self.extract_metadata()
+        return self.extract_diffs()
+
+    def extract_metadata(self):
+        """Walk-only pass: store each commit's metadata and parents, no diffs"""
         self.db_path.parent.mkdir(exist_ok=True)
         if self.db_path.exists():
             self.db_path.unlink()
 
         conn = sqlite3.connect(self.db_path)
+        # WAL lets readers query the finished metadata while diffs are written
+        conn.execute('PRAGMA journal_mode = WAL')
         self._create_schema(conn)
 
         commit_count = 0
+        stored = 0
         batch = []
 
         # Walk commits in topological order
-        for commit in self.repo.walk(self.repo.head.target, pygit2.GIT_SORT_TOPOLOGICAL):
+        for commit in self._walk():
+            # Reachability has to flow through every commit, sampled or not
+            refs = self.ref_index.visit(commit) if self.ref_index else None
+
             if self.sample_rate and commit_count % self.sample_rate != 0:
                 commit_count += 1
                 continue
 
-            batch.append(self._extract_commit(commit))
+            batch.append(self._extract_metadata(commit) + (refs,))
+            
+            if len(batch) >= 10000:
+                self._write_commits(conn, batch)
+                batch = []
+                print(f"   Walked {commit_count} commits...", end='\r')
+
+            commit_count += 1
+            stored += 1
+
+        if batch:
+            self._write_commits(conn, batch)
+
+        if self.ref_index:
+            conn.executemany('INSERT INTO refs VALUES (?, ?, ?, ?)', self.ref_index.rows())
+        store_schema.create_metadata_indexes(conn)
+        conn.commit()
+        conn.close()
+        print(f"   Walked {stored} commits (metadata ready)")
+        return self.db_path
+
+    def extract_diffs(self):
+        """Diff pass: extract file changes for every commit stored by extract_metadata()"""
+        conn = sqlite3.connect(self.db_path)
+        commits = conn.execute('SELECT id, sha FROM commits ORDER BY id').fetchall()
+
+        # Same newest-first order as the walk, which lineage assignment relies on
+        batch = []
+        for commit_count, (commit_id, sha) in enumerate(commits, 1):
+            commit = self.repo[sha]
+            batch.append((commit_id, commit.commit_time) + self._extract_commit(commit))
             
             if len(batch) >= 1000:
                 self._write_batch(conn, batch)
                 batch = []
                 print(f"   Processed {commit_count} commits...", end='\r')
 
-            commit_count += 1
-
         if batch:
             self._write_batch(conn, batch)
 
+        self._write_lineage(conn)
+        store_schema.create_change_indexes(conn)
         conn.commit()
+        # Back to a rollback journal so read-only connections need no -shm
+        # file; if a reader still has the store open it stays in WAL mode
+        try:
+            conn.execute('PRAGMA journal_mode = DELETE')
+        except sqlite3.OperationalError:
+            pass
         conn.close()
-        print(f"   Processed {commit_count} commits total")
+        print(f"   Processed {len(commits)} commits total")
+        if any(self.skipped.values()):
+            print(f"   Skipped {self.skipped['ignored']} ignored and "
+                  f"{self.skipped['oversized']} oversized file changes")
         return self.db_path
 
+    def _walk(self):
+        """Walk HEAD, or the union of all selected refs with each commit visited once"""
+        if not self.ref_index:
+            return self.repo.walk(self.repo.head.target, pygit2.GIT_SORT_TOPOLOGICAL)
+
+        tips = self.ref_index.tips()
+        if not tips:
+            raise ValueError("No refs matched for analysis")
+        walker = self.repo.walk(tips[0], pygit2.GIT_SORT_TOPOLOGICAL)
+        for tip in tips[1:]:
+            walker.push(tip)
+        return walker
+
     def _create_schema(self, conn):
         """Create database schema"""
-        conn.execute('''
-            CREATE TABLE commits (
-                sha TEXT PRIMARY KEY,
-                timestamp INTEGER,
-                author TEXT,
-                message TEXT
-            )
-        ''')
-        conn.execute('''
-            CREATE TABLE file_changes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                commit_sha TEXT,
-                file_path TEXT,
-                lines_added INTEGER,
-                lines_deleted INTEGER,
-                FOREIGN KEY (commit_sha) REFERENCES commits(sha)
-            )
-        ''')
-        conn.execute('CREATE INDEX idx_file_path ON file_changes(file_path)')
-        conn.execute('CREATE INDEX idx_commit_sha ON file_changes(commit_sha)')
+        store_schema.create_schema(conn)
+
+    def _extract_metadata(self, commit):
+        """Extract what the walk alone provides: no trees or blobs are read"""
+        parents = ' '.join(str(parent_id) for parent_id in commit.parent_ids)
+        return (str(commit.id), commit.commit_time, commit.author.name, commit.message.strip(), parents)
 
     def _extract_commit(self, commit):
-        """Extract commit metadata and file changes"""
-        timestamp = commit.commit_time
-        author = commit.author.name
-        message = commit.message.strip()
-        
+        """Extract file changes and renames"""
         file_changes = []
+        renames = []
         
         # Get diff against first parent (or empty tree for initial commit)
         if commit.parents:
@@ -85,34 +145,78 @@ class CommitWalker:
         else:
             diff = commit.tree.diff_to_tree(context_lines=0, swap=True)
 
-        # Find renames
+        # Find renames. Detection runs over the whole diff inside libgit2 and
+        # can't be seeded with earlier results, so only patch stats are cached
         diff.find_similar(flags=pygit2.GIT_DIFF_FIND_RENAMES)
 
-        for patch in diff:
-            delta = patch.delta
+        rebinds = []
+        for i, delta in enumerate(diff.deltas):
             file_path = delta.new_file.path
             
+            # Filter on the delta alone so unwanted files never get a patch
+            if self.ingest_filter.is_ignored(file_path):
+                self.skipped['ignored'] += 1
+                continue
+            # A submodule's gitlink names a commit in another repository, not a blob here
+            blob_ids = [f.id for f in (delta.old_file, delta.new_file) if f.mode != pygit2.GIT_FILEMODE_COMMIT]
+            if self.ingest_filter.is_oversized(self.repo.odb, *blob_ids):
+                self.skipped['oversized'] += 1
+                continue
+            
+            lineage_id = self.lineage.lineage_of(file_path)
+
+            if delta.status == pygit2.GIT_DELTA_RENAMED:
+                old_path = delta.old_file.path
+                renames.append((old_path, file_path, delta.similarity))
+                rebinds.append((old_path, lineage_id))
+
+                # Same blob pair already measured (e.g. a cherry-picked move)
+                stats = self.lineage.cached_rename(delta.old_file.id, delta.new_file.id)
+                if stats is None:
+                    stats = self._line_stats(diff[i])
+                    self.lineage.cache_rename(delta.old_file.id, delta.new_file.id, stats)
+            else:
+                stats = self._line_stats(diff[i])
+
             # Skip binary files
-            if delta.is_binary:
+            if stats is None:
                 continue
 
-            lines_added = patch.line_stats[1]
-            lines_deleted = patch.line_stats[2]
-            
-            file_changes.append((file_path, lines_added, lines_deleted))
+            lines_added, lines_deleted = stats
+            file_changes.append((file_path, lineage_id, lines_added, lines_deleted))
+
+        # Older commits see the pre-rename paths as these lineages
+        self.lineage.rebind(rebinds)
+
+        return (file_changes, renames)
+
+    def _line_stats(self, patch):
+        """Return (added, deleted) for a patch, or None if binary"""
+        if patch.delta.is_binary:
+            return None
+        return patch.line_stats[1], patch.line_stats[2]
 
-        return (str(commit.id), timestamp, author, message, file_changes)
+    def _write_commits(self, conn, batch):
+        """Write batch of commit metadata to database"""
+        conn.executemany(
+            'INSERT INTO commits (sha, timestamp, author, message, parents, refs) VALUES (?, ?, ?, ?, ?, ?)',
+            batch
+        )
 
     def _write_batch(self, conn, batch):
-        """Write batch of commits to database"""
-        for sha, timestamp, author, message, file_changes in batch:
-            conn.execute(
-                'INSERT INTO commits VALUES (?, ?, ?, ?)',
-                (sha, timestamp, author, message)
+        """Write batch of file changes to database"""
+        for commit_id, timestamp, file_changes, renames in batch:
+            conn.executemany(
+                'INSERT INTO file_changes (commit_id, timestamp, file_path, lineage_id, lines_added, lines_deleted) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(commit_id, timestamp, *change) for change in file_changes]
             )
-            
-            for file_path, added, deleted in file_changes:
-                conn.execute(
-                    'INSERT INTO file_changes (commit_sha, file_path, lines_added, lines_deleted) VALUES (?, ?, ?, ?)',
-                    (sha, file_path, added, deleted)
-                )
+
+            conn.executemany(
+                'INSERT INTO renames VALUES (?, ?, ?, ?)',
+                [(commit_id, old, new, similarity) for old, new, similarity in renames]
+            )
+
+    def _write_lineage(self, conn):
+        """Write each lineage's current path"""
+        conn.executemany('INSERT INTO lineage VALUES (?, ?)', self.lineage.rows())
@@ -0,0 +1,102 @@
+"""Directory tree - hierarchical rollups of per-file change data"""
+
+import math
+
+
+class DirectoryTree:
+    def __init__(self, nodes=None):
+        self.nodes = nodes or {}
+
+    @classmethod
+    def build(cls, rows, total_commits):
+        """Aggregate every directory level in one pass.
+
+        rows are (commit_id, file_path, churn) tuples ordered by commit_id.
+        A directory counts a commit once, however many of its files changed,
+        and the commit is "cross" for that directory when it also touched
+        files outside it.
+        """
+        tree = cls()
+        files = set()
+        current = None
+        touched = {}
+        commit_files = 0
+
+        for commit_id, file_path, churn in rows:
+            if commit_id != current:
+                tree._close_commit(touched, commit_files)
+                current = commit_id
+                touched = {}
+                commit_files = 0
+
+            commit_files += 1
+            files.add(file_path)
+            for path in cls.ancestors(file_path):
+                node = tree._node(path)
+                node['churn'] += churn
+                touched[path] = touched.get(path, 0) + 1
+
+        tree._close_commit(touched, commit_files)
+
+        for file_path in files:
+            for path in cls.ancestors(file_path):
+                tree.nodes[path]['files'] += 1
+
+        for node in tree.nodes.values():
+            volatility = node['commits'] / total_commits if total_commits else 0
+            node['score'] = volatility * math.log(1 + node['churn'])
+            node['coupling'] = node.pop('cross_commits') / node['commits'] if node['commits'] else 0
+
+        return tree
+
+    @classmethod
+    def from_list(cls, nodes):
+        """Rebuild a tree from the flat list stored in metrics"""
+        return cls({node['path']: node for node in nodes})
+
+    @staticmethod
+    def ancestors(file_path):
+        """Return every directory containing file_path, root ('') first"""
+        parts = file_path.split('/')[:-1]
+        return [''] + ['/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+    def _node(self, path):
+        node = self.nodes.get(path)
+        if node is None:
+            parent = path.rsplit('/', 1)[0] if '/' in path else ('' if path else None)
+            node = {
+                'path': path,
+                'parent': parent,
+                'depth': path.count('/') + 1 if path else 0,
+                'commits': 0,
+                'churn': 0,
+                'files': 0,
+                'cross_commits': 0
+            }
+            self.nodes[path] = node
+        return node
+
+    def _close_commit(self, touched, commit_files):
+        for path, count in touched.items():
+            node = self.nodes[path]
+            node['commits'] += 1
+            if count < commit_files:
+                node['cross_commits'] += 1
+
+    def node(self, path):
+        """Return the rollup for a directory ('' is the repository root)"""
+        return self.nodes.get(path.strip('/'))
+
+    def children(self, path):
+        """Return the direct subdirectories of a directory"""
+        path = path.strip('/')
+        return [n for n in self.nodes.values() if n['parent'] == path]
+
+    def at_depth(self, depth):
+        """Return all directories at the given depth, highest score first"""
+        nodes = [n for n in self.nodes.values() if n['depth'] == depth]
+        return sorted(nodes, key=lambda x: x['score'], reverse=True)
+
+    def to_list(self):
+        """Flatten to a JSON-serialisable list ordered by path"""
+        return [self.nodes[path] for path in sorted(self.nodes)]
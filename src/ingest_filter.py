@@ -0,0 +1,147 @@
+"""Ingest filter - keeps generated, vendored and oversized files out of extraction"""
+
+import re
+from pathlib import Path
+
+# Lockfiles, vendored trees and build output that dominate churn without
+# reflecting real development
+DEFAULT_IGNORES = [
+    'package-lock.json',
+    'yarn.lock',
+    'pnpm-lock.yaml',
+    'Cargo.lock',
+    'poetry.lock',
+    'Pipfile.lock',
+    'composer.lock',
+    'Gemfile.lock',
+    'go.sum',
+    'vendor/',
+    'node_modules/',
+    'third_party/',
+    'dist/',
+    '*.min.js',
+    '*.min.css',
+    '*.map'
+]
+
+# .gitattributes markers that flag a path as not hand-written
+GENERATED_ATTRIBUTES = ('linguist-generated', 'linguist-vendored')
+
+# Blobs larger than this are skipped before any patch is generated
+DEFAULT_MAX_BLOB_SIZE = 1 << 20
+
+
+def _translate(pattern):
+    """Translate the glob part of a gitignore pattern to a regex"""
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            regex += f'[{body}]'
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+def compile_pattern(pattern):
+    """Compile one gitignore-style pattern to (regex, negated)"""
+    negated = pattern.startswith('!')
+    if negated:
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+
+    # A slash anywhere but the end anchors the pattern to the repo root
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+
+    prefix = '^' if anchored else '^(?:.*/)?'
+    # Directory patterns match everything beneath them; others also match
+    # a directory of that name
+    suffix = '/.*$' if dir_only else '(?:/.*)?$'
+    return re.compile(prefix + _translate(pattern) + suffix), negated
+
+
+class IngestFilter:
+    def __init__(self, patterns=None, max_blob_size=DEFAULT_MAX_BLOB_SIZE):
+        self.max_blob_size = max_blob_size
+        self._rules = []
+        self._decisions = {}
+        self.add_patterns(patterns or [])
+
+    @classmethod
+    def for_repo(cls, repo, patterns=None, ignore_files=None, use_defaults=True,
+                 max_blob_size=DEFAULT_MAX_BLOB_SIZE):
+        """Build a filter from defaults, the repo's .gitattributes and user patterns"""
+        ingest_filter = cls(DEFAULT_IGNORES if use_defaults else [], max_blob_size)
+        ingest_filter.add_gitattributes(repo)
+        for path in ignore_files or []:
+            ingest_filter.add_patterns(Path(path).read_text().splitlines())
+        ingest_filter.add_patterns(patterns or [])
+        return ingest_filter
+
+    def add_patterns(self, lines):
+        """Add gitignore-style patterns; later patterns take precedence"""
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                self._rules.append(compile_pattern(line))
+        self._decisions.clear()
+
+    def add_gitattributes(self, repo):
+        """Ignore paths marked linguist-generated/vendored in HEAD's .gitattributes"""
+        if repo.head_is_unborn:
+            return
+        tree = repo[repo.head.target].tree
+        if '.gitattributes' not in tree:
+            return
+
+        text = tree['.gitattributes'].data.decode('utf-8', errors='replace')
+        for line in text.splitlines():
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            pattern, attributes = fields[0], fields[1:]
+            for attribute in attributes:
+                name, _, value = attribute.lstrip('-!').partition('=')
+                if name not in GENERATED_ATTRIBUTES:
+                    continue
+                unset = attribute.startswith(('-', '!')) or value == 'false'
+                self.add_patterns([('!' if unset else '') + pattern])
+
+    def is_ignored(self, path):
+        """Return True if the last matching pattern ignores path"""
+        ignored = self._decisions.get(path)
+        if ignored is None:
+            ignored = False
+            for regex, negated in self._rules:
+                if regex.match(path):
+                    ignored = not negated
+            self._decisions[path] = ignored
+        return ignored
+
+    def is_oversized(self, odb, *oids):
+        """Return True if any of the blobs exceeds max_blob_size"""
+        if not self.max_blob_size:
+            return False
+        # Zero OIDs (the missing side of an add/delete) are falsy
+        return any(oid and odb.read_header(oid)[1] > self.max_blob_size for oid in oids)
@@ -1,22 +1,32 @@
 """Insight engine - generates actionable insights from metrics"""
 
-import statistics
 import re
 
 
 class InsightEngine:
+    # Insight name -> method; each reads only the metrics it needs
+    INSIGHTS = {
+        'instability_periods': '_detect_instability',
+        'localized_anomalies': '_localize_anomalies',
+        'risky_files': '_identify_risky_files',
+        'bug_fix_correlation': '_analyze_bug_fixes',
+        'stagnation': '_detect_stagnation',
+        'coupling_warnings': '_analyze_coupling'
+    }
+
     def __init__(self, metrics):
         self.metrics = metrics
 
-    def analyze(self):
-        """Generate all insights"""
+    def analyze(self, names=None):
+        """Generate insights (all of them unless names are given).
+
+        metrics may be a lazy Analysis, in which case only the metrics the
+        requested insights read are ever computed.
+        """
         insights = {
-            'instability_periods': self._detect_instability(),
-            'risky_files': self._identify_risky_files(),
-            'bug_fix_correlation': self._analyze_bug_fixes(),
-            'stagnation': self._detect_stagnation(),
-            'coupling_warnings': self._analyze_coupling(),
-            'summary': []
+            name: getattr(self, method)()
+            for name, method in self.INSIGHTS.items()
+            if names is None or name in names
         }
         
         # Generate summary
@@ -25,27 +35,38 @@ class InsightEngine:
         return insights
 
     def _detect_instability(self):
-        """Detect periods of high churn"""
-        weekly_churn = self.metrics['weekly_churn']
+        """Repo-wide churn anomalies against a rolling median/MAD baseline"""
+        anomalies = self.metrics['anomalies']
+        
+        return [
+            {
+                'period': anomaly['period'],
+                'granularity': anomalies['granularity'],
+                'churn': anomaly['value'],
+                'multiplier': anomaly['multiplier']
+            }
+            for anomaly in anomalies['repo']
+        ]
+
+    def _localize_anomalies(self):
+        """Surface the strongest directory- and file-level churn anomalies"""
+        anomalies = self.metrics.get('anomalies')
         
-        if len(weekly_churn) < 4:
+        if not anomalies:
             return []
         
-        churn_values = [w['churn'] for w in weekly_churn]
-        median_churn = statistics.median(churn_values)
-        
-        threshold = median_churn * 2
-        
-        unstable_periods = []
-        for week_data in weekly_churn:
-            if week_data['churn'] > threshold:
-                unstable_periods.append({
-                    'week': week_data['week'],
-                    'churn': week_data['churn'],
-                    'multiplier': round(week_data['churn'] / median_churn, 1)
+        localized = []
+        for kind, key in (('directory', 'directories'), ('file', 'files')):
+            for anomaly in anomalies[key][:5]:
+                localized.append({
+                    'kind': kind,
+                    'path': anomaly['path'],
+                    'period': anomaly['period'],
+                    'churn': anomaly['value'],
+                    'multiplier': anomaly['multiplier']
                 })
         
-        return unstable_periods
+        return localized
 
     def _identify_risky_files(self):
         """Identify high-risk files"""
@@ -67,12 +88,30 @@ class InsightEngine:
         } for h in risky]
 
     def _analyze_bug_fixes(self):
-        """Analyze bug-fix patterns (placeholder - needs commit messages)"""
-        # This would require analyzing commit messages from the database
-        # For MVP, return placeholder
+        """Find files that keep needing fixes, and whether they are also hotspots"""
+        bug_fixes = self.metrics.get('bug_fixes')
+        
+        if not bug_fixes or not bug_fixes['fix_commits']:
+            return {'detected': False}
+        
+        # Enough history to judge, and fixed at least 1.5x as often as the repo overall
+        fix_prone = [
+            f for f in bug_fixes['files']
+            if f['fix_commits'] >= 3 and f['fix_ratio'] >= 1.5 * bug_fixes['fix_ratio']
+        ][:10]
+        
+        hotspot_files = {h['file'] for h in self.metrics['hotspots'][:10]}
+        
         return {
-            'detected': False,
-            'note': 'Bug-fix analysis requires commit message parsing (future enhancement)'
+            'detected': bool(fix_prone),
+            'fix_commits': bug_fixes['fix_commits'],
+            'fix_ratio': round(bug_fixes['fix_ratio'], 2),
+            'fix_prone_files': [{
+                'file': f['file'],
+                'fix_commits': f['fix_commits'],
+                'fix_ratio': round(f['fix_ratio'], 2),
+                'hotspot': f['file'] in hotspot_files
+            } for f in fix_prone]
         }
 
     def _detect_stagnation(self):
@@ -122,23 +161,34 @@ class InsightEngine:
         summary.append(f"Period: {meta['start_date'][:10]} to {meta['end_date'][:10]}")
         
         # Instability
-        if insights['instability_periods']:
+        if insights.get('instability_periods'):
             count = len(insights['instability_periods'])
             summary.append(f"[!] {count} instability period(s) detected with >2x normal churn")
         
+        if insights.get('localized_anomalies'):
+            top = insights['localized_anomalies'][0]
+            summary.append(f"[!] Churn spike in {top['kind']} {top['path']} ({top['period']}, {top['multiplier']}x baseline)")
+        
         # Risky files
-        if insights['risky_files']:
+        if insights.get('risky_files'):
             top_file = insights['risky_files'][0]
             summary.append(f"[HOT] Top hotspot: {top_file['file']} (score: {top_file['score']})")
         
+        # Fixes
+        bug_fixes = insights.get('bug_fix_correlation', {})
+        if bug_fixes.get('detected'):
+            top = bug_fixes['fix_prone_files'][0]
+            summary.append(f"[BUG] {bug_fixes['fix_ratio']:.0%} of commits are fixes; most fix-prone: {top['file']} ({top['fix_commits']} fixes)")
+        
         # Coupling
-        if insights['coupling_warnings']:
+        if insights.get('coupling_warnings'):
             summary.append(f"[LINK] {len(insights['coupling_warnings'])} high-coupling file pairs detected")
         
         # Stagnation
-        if insights['stagnation'].get('stagnant'):
+        stagnation = insights.get('stagnation', {})
+        if stagnation.get('stagnant'):
             summary.append(f"[PAUSE] Possible stagnation detected")
-        elif 'halflife_days' in insights['stagnation']:
+        elif 'halflife_days' in stagnation:
             days = insights['stagnation']['halflife_days']
             summary.append(f"[OK] Active codebase (half-life: {days:.0f} days)")
         
@@ -0,0 +1,51 @@
+"""Lineage index - follows a file's identity across renames"""
+
+
+class LineageIndex:
+    """Assigns every file change to a lineage during the newest-first walk.
+
+    A path maps to the lineage it belongs to at the point of history being
+    walked. A rename old -> new rebinds old to new's lineage for the older
+    commits still to come, while changes already seen keep theirs, so a
+    path reused after a move starts a lineage of its own.
+    """
+
+    def __init__(self):
+        self._current = {}
+        self._paths = []
+        self._rename_cache = {}
+
+    def lineage_of(self, path):
+        """Return the lineage ID path has at this point in the walk"""
+        lineage_id = self._current.get(path)
+        if lineage_id is None:
+            # First (newest) sighting, so this is the file's current name
+            self._paths.append(path)
+            lineage_id = self._current[path] = len(self._paths)
+        return lineage_id
+
+    def rebind(self, renames):
+        """Apply a commit's renames, as (old_path, lineage_id) pairs, to older commits.
+
+        Applied once per commit, after all of its changes were assigned, so
+        swapped or reused paths within the commit resolve against its state.
+        """
+        for old_path, lineage_id in renames:
+            self._current[old_path] = lineage_id
+
+    def display_path(self, lineage_id):
+        """Return the current (most recent) path of a lineage"""
+        return self._paths[lineage_id - 1]
+
+    def cached_rename(self, old_blob, new_blob):
+        """Return cached line stats for a blob pair, or None if unseen"""
+        return self._rename_cache.get((old_blob, new_blob))
+
+    def cache_rename(self, old_blob, new_blob, stats):
+        """Remember line stats for a renamed blob pair"""
+        self._rename_cache[(old_blob, new_blob)] = stats
+
+    def rows(self):
+        """Yield (lineage_id, lineage_path) for every lineage"""
+        for lineage_id, path in enumerate(self._paths, 1):
+            yield lineage_id, path
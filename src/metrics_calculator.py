@@ -4,26 +4,104 @@ import sqlite3
 import json
 from datetime import datetime, timedelta
 from collections import defaultdict
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+from pathlib import Path
+from urllib.request import pathname2url
 import math
+import heapq
+from src.directory_tree import DirectoryTree
+from src.minhash import MinHashCoupling
+from src.anomaly_detector import AnomalyDetector, period_key
+from src.commit_search import CommitSearch, FIX_QUERY
+from src import store_schema
+
+
+def _compute_in_worker(db_path, options, name, deps):
+    """Executor entry point: compute one metric on its own read-only connection"""
+    calculator = MetricsCalculator(db_path, read_only=True, **options)
+    calculator._cache.update(deps)
+    try:
+        return calculator.get(name)
+    finally:
+        calculator.conn.close()
 
 
 class MetricsCalculator:
-    def __init__(self, db_path):
+    # Metric name -> (method, intermediate results passed to it)
+    METRICS = {
+        'metadata': ('_get_metadata', ['total_commits', 'file_stats']),
+        'loc_over_time': ('_compute_loc_trend', []),
+        'weekly_churn': ('_compute_churn', []),
+        'file_volatility': ('_compute_volatility', ['total_commits', 'file_stats']),
+        'commit_density': ('_compute_density', []),
+        'commit_summary': ('_get_commit_summary', []),
+        'hotspots': ('_compute_hotspots', ['total_commits', 'file_stats']),
+        'directory_rollups': ('_compute_directory_rollups', ['total_commits', 'lineage_names']),
+        'temporal_coupling': ('_compute_coupling', ['lineage_names']),
+        'anomalies': ('_compute_anomalies', ['lineage_names']),
+        'bug_fixes': ('_compute_bug_fixes', ['total_commits', 'lineage_names', 'file_stats']),
+        'stability_halflife': ('_compute_halflife', [])
+    }
+
+    # Shared results several metrics depend on; computed once, never exported
+    INTERMEDIATES = {
+        'total_commits': ('_count_commits', []),
+        'lineage_names': ('_get_lineage_names', []),
+        'file_stats': ('_compute_file_stats', ['lineage_names'])
+    }
+
+    # Metrics that read only the commits table, so they can be computed as
+    # soon as CommitWalker.extract_metadata() has run
+    COMMIT_LEVEL = ('commit_summary', 'commit_density')
+
+    # Pure-Python aggregation that holds the GIL; run in processes when parallel
+    CPU_BOUND = {'directory_rollups', 'temporal_coupling', 'anomalies'}
+
+    def __init__(self, db_path, approximate_coupling=False, coupling_similarity=0.3, coupling_error=0.1,
+                 anomaly_granularity='week', read_only=False):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-
-    def compute_all(self):
-        """Compute all metrics and return as dictionary"""
-        metrics = {
-            'metadata': self._get_metadata(),
-            'loc_over_time': self._compute_loc_trend(),
-            'weekly_churn': self._compute_churn(),
-            'file_volatility': self._compute_volatility(),
-            'commit_density': self._compute_density(),
-            'hotspots': self._compute_hotspots(),
-            'temporal_coupling': self._compute_coupling(),
-            'stability_halflife': self._compute_halflife()
+        if read_only:
+            uri = f'file:{pathname2url(str(Path(db_path).resolve()))}?mode=ro'
+            self.conn = sqlite3.connect(uri, uri=True)
+        else:
+            self.conn = sqlite3.connect(db_path)
+            store_schema.migrate(self.conn)
+        self.options = {
+            'approximate_coupling': approximate_coupling,
+            'coupling_similarity': coupling_similarity,
+            'coupling_error': coupling_error,
+            'anomaly_granularity': anomaly_granularity
         }
+        self.anomaly_granularity = anomaly_granularity
+        self.approximate_coupling = approximate_coupling
+        self.coupling_similarity = coupling_similarity
+        self.coupling_error = coupling_error
+        self._cache = {}
+
+    def get(self, name):
+        """Compute a metric (and what it depends on) once, then reuse it"""
+        if name not in self._cache:
+            method, deps = self.METRICS.get(name) or self.INTERMEDIATES[name]
+            self._cache[name] = getattr(self, method)(*[self.get(dep) for dep in deps])
+        return self._cache[name]
+
+    def computed(self):
+        """Names of the metrics and intermediates computed so far"""
+        return list(self._cache)
+
+    def compute_all(self, workers=None):
+        """Compute all metrics and return as dictionary.
+
+        With workers > 1 the metrics run concurrently, each on its own
+        read-only connection: SQL-bound ones in threads (sqlite3 releases
+        the GIL while a query runs), CPU_BOUND ones in processes.
+        """
+        if workers and workers > 1:
+            self._compute_parallel(workers)
+        
+        metrics = {name: self.get(name) for name in self.METRICS}
         
         # Save to JSON
         output_path = 'data/metrics.json'
@@ -32,16 +110,61 @@ class MetricsCalculator:
         
         return metrics
 
-    def _get_metadata(self):
-        """Get repository metadata"""
-        cursor = self.conn.execute('SELECT COUNT(*) FROM commits')
-        total_commits = cursor.fetchone()[0]
+    def _compute_parallel(self, workers):
+        """Compute every metric not yet cached, starting each once its inputs are ready"""
+        pending = {
+            name: deps
+            for name, (_, deps) in {**self.INTERMEDIATES, **self.METRICS}.items()
+            if name not in self._cache
+        }
+        running = {}
+        
+        # Spawn rather than fork: forking while pool threads hold locks can deadlock
+        spawn = multiprocessing.get_context('spawn')
         
+        with ThreadPoolExecutor(workers) as threads, \
+                ProcessPoolExecutor(min(workers, len(self.CPU_BOUND)), mp_context=spawn) as processes:
+            while pending or running:
+                for name, deps in list(pending.items()):
+                    if all(dep in self._cache for dep in deps):
+                        executor = processes if name in self.CPU_BOUND else threads
+                        inputs = {dep: self._cache[dep] for dep in deps}
+                        future = executor.submit(_compute_in_worker, self.db_path, self.options, name, inputs)
+                        running[future] = name
+                        del pending[name]
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._cache[running.pop(future)] = future.result()
+
+    def _count_commits(self):
+        """Count analyzed commits"""
+        return self.conn.execute('SELECT COUNT(*) FROM commits').fetchone()[0]
+
+    def _get_lineage_names(self):
+        """Map lineage IDs to their current file path"""
+        cursor = self.conn.execute('SELECT lineage_id, lineage_path FROM lineage')
+        return dict(cursor)
+
+    def _compute_file_stats(self, lineage_names):
+        """Commits and churn per file lineage"""
+        cursor = self.conn.execute('''
+            SELECT 
+                lineage_id,
+                COUNT(DISTINCT commit_id) as commits,
+                SUM(lines_added + lines_deleted) as total_churn
+            FROM file_changes
+            GROUP BY lineage_id
+        ''')
+        
+        return [(lineage_names[lineage_id], commits, churn) for lineage_id, commits, churn in cursor]
+
+    def _get_metadata(self, total_commits, file_stats):
+        """Get repository metadata"""
         cursor = self.conn.execute('SELECT MIN(timestamp), MAX(timestamp) FROM commits')
         min_ts, max_ts = cursor.fetchone()
         
-        cursor = self.conn.execute('SELECT COUNT(DISTINCT file_path) FROM file_changes')
-        total_files = cursor.fetchone()[0]
+        total_files = len(file_stats)
         
         return {
             'total_commits': total_commits,
@@ -53,11 +176,10 @@ class MetricsCalculator:
     def _compute_loc_trend(self):
         """Compute cumulative LOC over time"""
         cursor = self.conn.execute('''
-            SELECT c.timestamp, SUM(fc.lines_added - fc.lines_deleted) as net_change
-            FROM commits c
-            JOIN file_changes fc ON c.sha = fc.commit_sha
-            GROUP BY c.sha
-            ORDER BY c.timestamp
+            SELECT timestamp, SUM(lines_added - lines_deleted) as net_change
+            FROM file_changes
+            GROUP BY timestamp, commit_id
+            ORDER BY timestamp, commit_id
         ''')
         
         cumulative_loc = 0
@@ -75,11 +197,10 @@ class MetricsCalculator:
     def _compute_churn(self):
         """Compute weekly code churn"""
         cursor = self.conn.execute('''
-            SELECT c.timestamp, SUM(fc.lines_added + fc.lines_deleted) as churn
-            FROM commits c
-            JOIN file_changes fc ON c.sha = fc.commit_sha
-            GROUP BY c.sha
-            ORDER BY c.timestamp
+            SELECT timestamp, SUM(lines_added + lines_deleted) as churn
+            FROM file_changes
+            GROUP BY timestamp, commit_id
+            ORDER BY timestamp, commit_id
         ''')
         
         weekly_churn = defaultdict(int)
@@ -91,19 +212,10 @@ class MetricsCalculator:
         
         return [{'week': k, 'churn': v} for k, v in sorted(weekly_churn.items())]
 
-    def _compute_volatility(self):
+    def _compute_volatility(self, total_commits, file_stats):
         """Compute file volatility (commit frequency)"""
-        cursor = self.conn.execute('SELECT COUNT(*) FROM commits')
-        total_commits = cursor.fetchone()[0]
-        
-        cursor = self.conn.execute('''
-            SELECT file_path, COUNT(DISTINCT commit_sha) as commit_count
-            FROM file_changes
-            GROUP BY file_path
-        ''')
-        
         volatility = []
-        for file_path, commit_count in cursor:
+        for file_path, commit_count, _ in file_stats:
             volatility.append({
                 'file': file_path,
                 'commits': commit_count,
@@ -140,21 +252,30 @@ class MetricsCalculator:
         
         return density
 
-    def _compute_hotspots(self):
-        """Compute hotspot scores (volatility × log(churn))"""
-        cursor = self.conn.execute('''
-            SELECT 
-                file_path,
-                COUNT(DISTINCT commit_sha) as commits,
-                SUM(lines_added + lines_deleted) as total_churn
-            FROM file_changes
-            GROUP BY file_path
-        ''')
+    def _get_commit_summary(self):
+        """Commit, author and merge counts from commit metadata alone"""
+        commits, authors, merges, min_ts, max_ts = self.conn.execute('''
+            SELECT COUNT(*), COUNT(DISTINCT author), COALESCE(SUM(parents LIKE '% %'), 0),
+                   MIN(timestamp), MAX(timestamp)
+            FROM commits
+        ''').fetchone()
         
-        total_commits = self.conn.execute('SELECT COUNT(*) FROM commits').fetchone()[0]
+        cursor = self.conn.execute('SELECT author, COUNT(*) FROM commits GROUP BY author')
+        top_authors = heapq.nsmallest(10, cursor, key=lambda row: (-row[1], row[0]))
         
+        return {
+            'commits': commits,
+            'authors': authors,
+            'merges': merges,
+            'first_date': datetime.fromtimestamp(min_ts).isoformat() if min_ts else None,
+            'last_date': datetime.fromtimestamp(max_ts).isoformat() if max_ts else None,
+            'top_authors': [{'author': author, 'commits': count} for author, count in top_authors]
+        }
+
+    def _compute_hotspots(self, total_commits, file_stats):
+        """Compute hotspot scores (volatility × log(churn))"""
         hotspots = []
-        for file_path, commits, total_churn in cursor:
+        for file_path, commits, total_churn in file_stats:
             volatility = commits / total_commits
             hotspot_score = volatility * math.log(1 + total_churn)
             
@@ -167,24 +288,40 @@ class MetricsCalculator:
         
         return sorted(hotspots, key=lambda x: x['score'], reverse=True)[:50]
 
-    def _compute_coupling(self):
+    def _compute_directory_rollups(self, total_commits, lineage_names):
+        """Compute commits, churn, hotspot score and coupling per directory"""
+        cursor = self.conn.execute('''
+            SELECT commit_id, lineage_id, SUM(lines_added + lines_deleted)
+            FROM file_changes
+            GROUP BY commit_id, lineage_id
+            ORDER BY commit_id, lineage_id
+        ''')
+        
+        rows = ((commit_id, lineage_names[lineage_id], churn) for commit_id, lineage_id, churn in cursor)
+        return DirectoryTree.build(rows, total_commits).to_list()
+
+    def _compute_coupling(self, lineage_names):
         """Compute temporal coupling between files"""
-        # Get files modified in each commit
+        if self.approximate_coupling:
+            return self._compute_coupling_approx(lineage_names)
+        
+        # Get files (by lineage) modified in each commit
         cursor = self.conn.execute('''
-            SELECT commit_sha, GROUP_CONCAT(file_path) as files
+            SELECT commit_id, lineage_id
             FROM file_changes
-            GROUP BY commit_sha
+            GROUP BY commit_id, lineage_id
+            ORDER BY commit_id, lineage_id
         ''')
         
         # Count co-occurrences
         file_commits = defaultdict(set)
         co_occurrences = defaultdict(int)
         
-        for commit_sha, files_str in cursor:
-            files = files_str.split(',')
+        for commit_id, rows in groupby(cursor, key=lambda row: row[0]):
+            files = [lineage_names[lineage_id] for _, lineage_id in rows]
             
             for f in files:
-                file_commits[f].add(commit_sha)
+                file_commits[f].add(commit_id)
             
             # Only compute for commits with 2-10 files (avoid noise)
             if 2 <= len(files) <= 10:
@@ -217,17 +354,143 @@ class MetricsCalculator:
         
         return sorted(coupling, key=lambda x: x['score'], reverse=True)[:20]
 
+    def _compute_coupling_approx(self, lineage_names):
+        """Approximate temporal coupling with MinHash signatures and LSH.
+
+        Unlike the exact pass, commits of any size are included; memory stays
+        linear in the number of files.
+
+        Candidates are pairs whose Jaccard similarity clears the LSH threshold,
+        but they are then kept or dropped on the same containment score as the
+        exact pass (co-changes / smaller file's commits). A small file that
+        always changes with a much larger one scores 1.0 yet has a low Jaccard
+        (1/10 when the large file has 10x the commits), so it only becomes a
+        candidate if coupling_similarity is at or below that Jaccard.
+        """
+        minhash = MinHashCoupling(self.coupling_similarity, self.coupling_error)
+        
+        num_files = max(lineage_names, default=0) + 1
+        cursor = self.conn.execute('''
+            SELECT lineage_id, commit_id
+            FROM file_changes
+            GROUP BY lineage_id, commit_id
+        ''')
+        
+        def chunks():
+            while True:
+                rows = cursor.fetchmany(20000)
+                if not rows:
+                    return
+                yield zip(*rows)
+        
+        sigs, counts = minhash.signatures(chunks(), num_files)
+        
+        # Same low-activity filter as the exact pass
+        active = [int(f) for f in (counts >= 5).nonzero()[0]]
+        
+        coupling = []
+        for f1, f2 in minhash.candidate_pairs(sigs, active):
+            similarity = minhash.estimate(sigs, f1, f2)
+            
+            # |A ∩ B| from Jaccard: J * (|A| + |B|) / (1 + J)
+            f1_count, f2_count = int(counts[f1]), int(counts[f2])
+            co_count = similarity * (f1_count + f2_count) / (1 + similarity)
+            coupling_score = min(1.0, co_count / min(f1_count, f2_count))
+            
+            if co_count >= 3 and coupling_score > 0.3:
+                file1, file2 = sorted([lineage_names[f1], lineage_names[f2]])
+                coupling.append({
+                    'file1': file1,
+                    'file2': file2,
+                    'score': coupling_score,
+                    'co_changes': int(round(co_count))
+                })
+        
+        return sorted(coupling, key=lambda x: x['score'], reverse=True)[:20]
+
+    def _compute_anomalies(self, lineage_names):
+        """Detect churn anomalies per period for the repo, each directory and each file.
+
+        Changes are streamed in time order; each series' current period is
+        flushed to the detector as soon as a later period starts for it.
+        Only active periods are fed, so baselines compare like with like.
+        """
+        cursor = self.conn.execute('''
+            SELECT timestamp, lineage_id, lines_added + lines_deleted
+            FROM file_changes
+            ORDER BY timestamp
+        ''')
+        
+        detector = AnomalyDetector()
+        open_periods = {}
+        found = {'repo': [], 'directory': [], 'file': []}
+        
+        def flush(key, period, value):
+            anomaly = detector.update(key, period, value)
+            if anomaly:
+                kind, path = anomaly.pop('key')
+                anomaly['path'] = path
+                found[kind].append(anomaly)
+        
+        for timestamp, lineage_id, churn in cursor:
+            file_path = lineage_names[lineage_id]
+            period = period_key(timestamp, self.anomaly_granularity)
+            keys = [('repo', ''), ('file', file_path)]
+            keys += [('directory', d) for d in DirectoryTree.ancestors(file_path)[1:]]
+            
+            for key in keys:
+                current = open_periods.get(key)
+                if current is None or current[0] != period:
+                    if current is not None:
+                        flush(key, *current)
+                    open_periods[key] = current = [period, 0]
+                current[1] += churn
+        
+        for key, (period, value) in open_periods.items():
+            flush(key, period, value)
+        
+        by_score = lambda x: x['score']
+        return {
+            'granularity': self.anomaly_granularity,
+            'repo': sorted(found['repo'], key=lambda x: x['period']),
+            'directories': sorted(found['directory'], key=by_score, reverse=True)[:50],
+            'files': sorted(found['file'], key=by_score, reverse=True)[:50]
+        }
+
+    def _compute_bug_fixes(self, total_commits, lineage_names, file_stats):
+        """Count fix commits (by message) and the files they concentrate in"""
+        search = CommitSearch(conn=self.conn)
+        fix_commits = len(search.commit_ids(FIX_QUERY))
+        commits_by_file = {file_path: commits for file_path, commits, _ in file_stats}
+        
+        files = []
+        for lineage_id, (fixes, churn) in search.file_counts(FIX_QUERY).items():
+            file_path = lineage_names[lineage_id]
+            files.append({
+                'file': file_path,
+                'fix_commits': fixes,
+                'commits': commits_by_file[file_path],
+                'fix_ratio': fixes / commits_by_file[file_path],
+                'fix_churn': churn
+            })
+        
+        return {
+            'fix_commits': fix_commits,
+            'fix_ratio': fix_commits / total_commits if total_commits else 0,
+            'files': sorted(files, key=lambda x: (x['fix_commits'], x['fix_ratio']), reverse=True)[:50]
+        }
+
     def _compute_halflife(self):
         """Compute stability half-life"""
         cursor = self.conn.execute('''
-            SELECT DISTINCT file_path, MAX(c.timestamp) as last_modified
-            FROM file_changes fc
-            JOIN commits c ON fc.commit_sha = c.sha
-            GROUP BY file_path
-            ORDER BY last_modified DESC
+            SELECT lineage_id, MAX(timestamp) as last_modified
+            FROM file_changes
+            GROUP BY lineage_id
         ''')
         
-        files_by_date = [(f, ts) for f, ts in cursor]
+        # Sorted here rather than by an ORDER BY on the aggregate, which
+        # would need a temporary B-tree
+        files_by_date = sorted(cursor, key=lambda x: x[1], reverse=True)
         
         if not files_by_date:
             return None
@@ -0,0 +1,78 @@
+"""MinHash/LSH - approximate temporal coupling for very large repositories"""
+
+import math
+from collections import defaultdict
+import numpy as np
+
+# Mersenne prime 2^31 - 1: keeps (a * x + b) inside uint64 for 32-bit inputs
+_PRIME = (1 << 31) - 1
+
+
+class MinHashCoupling:
+    def __init__(self, similarity=0.3, error=0.1, seed=42):
+        """
+        similarity: Jaccard similarity of two files' commit sets above which
+            pairs should be reported as candidates (the LSH threshold)
+        error: target standard error of each similarity estimate; the number
+            of hash permutations grows as 1 / error^2
+        """
+        self.similarity = similarity
+        self.bands, self.rows = self._choose_bands(math.ceil(1 / error ** 2), similarity)
+        self.num_perm = self.bands * self.rows
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, self.num_perm, dtype=np.uint64)
+
+    @staticmethod
+    def _choose_bands(num_perm, similarity):
+        """Pick (bands, rows) whose LSH threshold (1/b)^(1/r) is closest to similarity"""
+        best = None
+        for rows in range(1, num_perm + 1):
+            bands = num_perm // rows
+            threshold = (1 / bands) ** (1 / rows)
+            distance = abs(threshold - similarity)
+            if best is None or distance < best[0]:
+                best = (distance, bands, rows)
+        return best[1], best[2]
+
+    def signatures(self, chunks, num_files):
+        """Build MinHash signatures from (file_index, commit_index) chunks.
+
+        Memory is num_perm x num_files regardless of history length.
+        Returns (signatures, commit counts per file).
+        """
+        sigs = np.full((self.num_perm, num_files), _PRIME, dtype=np.uint64)
+        counts = np.zeros(num_files, dtype=np.int64)
+        perm_index = np.arange(self.num_perm)[:, None]
+
+        for file_idx, commit_idx in chunks:
+            file_idx = np.asarray(file_idx, dtype=np.int64)
+            commit_idx = np.asarray(commit_idx, dtype=np.uint64)
+            hashes = (self._a[:, None] * commit_idx[None, :] + self._b[:, None]) % _PRIME
+            np.minimum.at(sigs, (perm_index, file_idx[None, :]), hashes)
+            counts += np.bincount(file_idx, minlength=num_files)
+
+        return sigs, counts
+
+    def candidate_pairs(self, sigs, files):
+        """Return file index pairs sharing at least one LSH band bucket"""
+        pairs = set()
+        for band in range(self.bands):
+            rows = np.ascontiguousarray(sigs[band * self.rows:(band + 1) * self.rows, files].T)
+            keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * self.rows))).ravel()
+            _, bucket = np.unique(keys, return_inverse=True)
+
+            buckets = defaultdict(list)
+            for file_index, bucket_id in zip(files, bucket.tolist()):
+                buckets[bucket_id].append(file_index)
+
+            for members in buckets.values():
+                for i, f1 in enumerate(members):
+                    for f2 in members[i+1:]:
+                        pairs.add((f1, f2))
+        return pairs
+
+    def estimate(self, sigs, f1, f2):
+        """Estimate Jaccard similarity of two files' commit sets"""
+        return float(np.mean(sigs[:, f1] == sigs[:, f2]))
@@ -0,0 +1,172 @@
+"""Ref index - which refs each commit is reachable from, for multi-branch analysis"""
+
+import sqlite3
+from collections import defaultdict
+from fnmatch import fnmatchcase
+from pathlib import Path
+import pygit2
+from src.lineage import LineageIndex
+from src import store_schema
+
+# Namespaces considered by --all-refs; notes, stashes and the like are not history
+REF_NAMESPACES = ('refs/heads/', 'refs/remotes/', 'refs/tags/')
+
+
+def match_ref(name, pattern):
+    """Case-sensitive glob match per path segment: * never crosses a '/',
+    while a '**' segment matches any number of segments"""
+    return _match_segments(name.split('/'), pattern.split('/'))
+
+
+def _match_segments(names, patterns):
+    if not patterns:
+        return not names
+    if patterns[0] == '**':
+        return any(_match_segments(names[i:], patterns[1:]) for i in range(len(names) + 1))
+    return bool(names) and fnmatchcase(names[0], patterns[0]) and _match_segments(names[1:], patterns[1:])
+
+
+def encode_mask(mask, width):
+    """Pack a ref bitmask into a little-endian BLOB of ceil(width / 8) bytes"""
+    return mask.to_bytes((width + 7) // 8, 'little')
+
+
+def mask_has_bit(blob, bit):
+    """SQL helper: is bit set in an encoded ref mask"""
+    if blob is None or bit // 8 >= len(blob):
+        return 0
+    return (blob[bit // 8] >> (bit % 8)) & 1
+
+
+class RefIndex:
+    """Selected refs and the reachability bitmask of every walked commit.
+
+    Bit i of a commit's mask is set when the commit is reachable from ref i.
+    Walking all tips in one topological pass visits each commit once, after
+    all of its children, so a commit's mask is just its own tip bits OR'd
+    with the masks its children pushed down; only the frontier is held.
+    """
+
+    def __init__(self, refs):
+        # [(name, shorthand, target oid)], bit i is refs[i]
+        self.refs = refs
+        self._tips = {}
+        for bit, (name, shorthand, target) in enumerate(refs):
+            self._tips[target] = self._tips.get(target, 0) | (1 << bit)
+        self._pending = {}
+
+    @classmethod
+    def resolve(cls, repo, patterns=None):
+        """Select refs whose full or short name matches any pattern (all refs if none)"""
+        refs = []
+        for name in sorted(repo.references):
+            if not name.startswith(REF_NAMESPACES):
+                continue
+            reference = repo.references[name]
+            if isinstance(reference.target, str):
+                continue    # e.g. refs/remotes/origin/HEAD duplicates a branch
+            shorthand = reference.shorthand
+            if patterns and not any(match_ref(name, p) or match_ref(shorthand, p) for p in patterns):
+                continue
+            try:
+                target = reference.peel(pygit2.Commit).id
+            except pygit2.GitError:
+                continue    # tags of trees or blobs
+            refs.append((name, shorthand, target))
+        return cls(refs)
+
+    @property
+    def width(self):
+        return len(self.refs)
+
+    def tips(self):
+        """Distinct commits to start the walk from"""
+        return list(self._tips)
+
+    def visit(self, commit):
+        """Return the encoded mask of a commit and push it down to its parents"""
+        mask = self._pending.pop(commit.id, 0) | self._tips.get(commit.id, 0)
+        for parent_id in commit.parent_ids:
+            self._pending[parent_id] = self._pending.get(parent_id, 0) | mask
+        return encode_mask(mask, self.width)
+
+    def rows(self):
+        """(bit, name, shorthand, target) rows for the refs table"""
+        for bit, (name, shorthand, target) in enumerate(self.refs):
+            yield bit, name, shorthand, str(target)
+
+
+def find_ref(conn, ref):
+    """Return (bit, name) of a recorded ref given its full or short name"""
+    row = conn.execute('SELECT bit, name FROM refs WHERE name = ? OR shorthand = ? ORDER BY bit',
+                       (ref, ref)).fetchone()
+    if row is None:
+        known = ', '.join(name for (name,) in conn.execute('SELECT shorthand FROM refs ORDER BY bit'))
+        raise ValueError(f"Ref not recorded in the analysis store: {ref} (known: {known or 'none'})")
+    return row
+
+
+def extract_ref_store(db_path, ref, output_path=None):
+    """Write a store restricted to the commits reachable from one ref.
+
+    Rows are copied with their ids intact, so no commit is walked or diffed
+    again; every metric then runs unchanged on the smaller store. Lineage is
+    rebuilt from the ref's own renames, since in the multi-ref walk a rename
+    on one branch also rebinds the old path on every other branch.
+    """
+    db_path = Path(db_path)
+    source = sqlite3.connect(db_path)
+    bit, name = find_ref(source, ref)
+    source.close()
+
+    if output_path is None:
+        safe_name = name.replace('refs/', '', 1).replace('/', '_')
+        output_path = db_path.with_name(f'{db_path.stem}_{safe_name}{db_path.suffix}')
+    output_path = Path(output_path)
+    if output_path.exists():
+        output_path.unlink()
+
+    conn = sqlite3.connect(output_path)
+    conn.create_function('mask_has_bit', 2, mask_has_bit, deterministic=True)
+    store_schema.create_schema(conn)
+    conn.execute('ATTACH DATABASE ? AS source', (str(db_path),))
+    conn.execute('''
+        INSERT INTO commits SELECT * FROM source.commits
+        WHERE mask_has_bit(refs, ?) ORDER BY id
+    ''', (bit,))
+    conn.execute('''
+        INSERT INTO file_changes SELECT * FROM source.file_changes
+        WHERE commit_id IN (SELECT id FROM commits) ORDER BY id
+    ''')
+    conn.execute('''
+        INSERT INTO renames SELECT * FROM source.renames
+        WHERE commit_id IN (SELECT id FROM commits)
+    ''')
+    conn.execute('INSERT INTO refs SELECT * FROM source.refs')
+    conn.commit()
+    conn.execute('DETACH DATABASE source')
+    _assign_lineage(conn)
+    store_schema.create_indexes(conn)
+    conn.commit()
+    conn.close()
+    return output_path
+
+
+def _assign_lineage(conn):
+    """Replay the store's renames newest-first, as the walker does, to assign lineage"""
+    renames = defaultdict(list)
+    for commit_id, old_path, new_path in conn.execute('SELECT commit_id, old_path, new_path FROM renames'):
+        renames[commit_id].append((old_path, new_path))
+    changes = defaultdict(list)
+    for change_id, commit_id, file_path in conn.execute('SELECT id, commit_id, file_path FROM file_changes ORDER BY id'):
+        changes[commit_id].append((change_id, file_path))
+
+    lineage = LineageIndex()
+    updates = []
+    for (commit_id,) in conn.execute('SELECT id FROM commits ORDER BY id').fetchall():
+        for change_id, file_path in changes.pop(commit_id, []):
+            updates.append((lineage.lineage_of(file_path), change_id))
+        lineage.rebind([(old_path, lineage.lineage_of(new_path)) for old_path, new_path in renames[commit_id]])
+
+    conn.executemany('UPDATE file_changes SET lineage_id = ? WHERE id = ?', updates)
+    conn.executemany('INSERT INTO lineage VALUES (?, ?)', lineage.rows())
@@ -4,19 +4,51 @@ import pygit2
 from pathlib import Path
 import tempfile
 import shutil
+import subprocess
 
 
 class RepoLoader:
-    def __init__(self, repo_path):
+    def __init__(self, repo_path, write_commit_graph=False):
         self.repo_path = repo_path
         self.temp_dir = None
+        # Opt-in for clones and local repos alike
+        self.write_commit_graph = write_commit_graph
 
     def load(self):
         """Load repository from path or URL"""
         if self._is_url(self.repo_path):
-            return self._clone_repo()
+            repo = self._clone_repo()
         else:
-            return self._open_local()
+            repo = self._open_local()
+        if self.write_commit_graph:
+            self.ensure_commit_graph(repo)
+        return repo
+
+    @staticmethod
+    def has_commit_graph(repo):
+        """True if the repository has a commit-graph file (single or split chain)"""
+        info = Path(repo.path) / 'objects' / 'info'
+        return (info / 'commit-graph').exists() or (info / 'commit-graphs' / 'commit-graph-chain').exists()
+
+    def ensure_commit_graph(self, repo):
+        """Write a commit-graph file if the repository lacks one.
+
+        Runs `git commit-graph write --reachable`, so it needs the git
+        executable; returns False if none could be written.
+        """
+        if self.has_commit_graph(repo):
+            return True
+        if shutil.which('git') is None:
+            print("   git not found; walking without a commit-graph")
+            return False
+
+        print("   Writing commit-graph...")
+        result = subprocess.run(['git', '--git-dir', repo.path, 'commit-graph', 'write', '--reachable'],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"   Could not write commit-graph: {result.stderr.strip()}")
+            return False
+        return True
 
     def _is_url(self, path):
         return path.startswith('http://') or path.startswith('https://') or path.startswith('git@')
@@ -3,31 +3,132 @@
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
+import gzip
+from datetime import datetime
 from pathlib import Path
+from src.downsample import lttb
+
+# Maximum points drawn per time-series chart
+MAX_CHART_POINTS = 500
+
+# Rows shown per page of the file table
+FILE_TABLE_PAGE_SIZE = 50
+
+_LOADER_JS = """
+        async function loadJson(url) {
+            const bytes = new Uint8Array(await (await fetch(url)).arrayBuffer());
+            let body = new Blob([bytes]).stream();
+            // Servers that send Content-Encoding: gzip have already inflated it
+            if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+                body = body.pipeThrough(new DecompressionStream('gzip'));
+            }
+            return new Response(body).json();
+        }
+
+        function whenVisible(id, callback) {
+            const observer = new IntersectionObserver((entries) => {
+                if (entries.some((entry) => entry.isIntersecting)) {
+                    observer.disconnect();
+                    callback();
+                }
+            }, {rootMargin: '200px'});
+            observer.observe(document.getElementById(id));
+        }
+
+        function lazyChart(id, url) {
+            whenVisible(id, () => loadJson(url).then((fig) => Plotly.newPlot(id, fig)));
+        }
+"""
+
+_FILE_TABLE_JS = """
+        function renderFileTable(rows) {
+            const pageSize = %d;
+            const body = document.getElementById('file-table-body');
+            const info = document.getElementById('file-table-info');
+            const filter = document.getElementById('file-table-filter');
+            let filtered = rows;
+            let page = 0;
+
+            function draw() {
+                const pages = Math.max(1, Math.ceil(filtered.length / pageSize));
+                page = Math.min(page, pages - 1);
+                body.replaceChildren(...filtered.slice(page * pageSize, (page + 1) * pageSize).map((row) => {
+                    const tr = document.createElement('tr');
+                    for (const value of row) {
+                        const td = document.createElement('td');
+                        td.textContent = value;
+                        tr.appendChild(td);
+                    }
+                    return tr;
+                }));
+                info.textContent = `Page ${page + 1} of ${pages} (${filtered.length} files)`;
+            }
+
+            document.getElementById('file-table-prev').onclick = () => { if (page > 0) { page--; draw(); } };
+            document.getElementById('file-table-next').onclick = () => { page++; draw(); };
+            filter.oninput = () => {
+                const query = filter.value.toLowerCase();
+                filtered = rows.filter((row) => row[0].toLowerCase().includes(query));
+                page = 0;
+                draw();
+            };
+            draw();
+        }
+""" % FILE_TABLE_PAGE_SIZE
 
 
 class ReportGenerator:
-    def __init__(self, metrics, insights):
+    def __init__(self, metrics, insights, split_data=False):
         self.metrics = metrics
         self.insights = insights
+        self.split_data = split_data
 
     def generate(self, output_path):
-        """Generate HTML report"""
-        Path(output_path).parent.mkdir(exist_ok=True)
+        """Generate HTML report.
+
+        With split_data, chart and table data are written as gzipped JSON
+        files next to the report and fetched when scrolled into view, so the
+        page itself stays small. The report must then be served over HTTP
+        (e.g. `python -m http.server`) since browsers block fetch on file://.
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(exist_ok=True)
         
-        html = self._build_html()
+        data_dir = None
+        if self.split_data:
+            data_dir = output_path.with_name(f'{output_path.stem}_data')
+            data_dir.mkdir(exist_ok=True)
+        
+        html = self._build_html(data_dir)
         
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(html)
 
-    def _build_html(self):
+    def _build_html(self, data_dir=None):
         """Build complete HTML report"""
-        charts = [
-            self._chart_loc_trend(),
-            self._chart_churn(),
-            self._chart_hotspots(),
-            self._chart_density()
-        ]
+        charts = {
+            'loc-chart': self._chart_loc_trend(),
+            'churn-chart': self._chart_churn(),
+            'hotspot-chart': self._chart_hotspots(),
+            'density-chart': self._chart_density(),
+            'directory-chart': self._chart_directories()
+        }
+        files = self._file_rows()
+        
+        if data_dir is None:
+            scripts = [f"Plotly.newPlot('{div_id}', {fig.to_json()});" for div_id, fig in charts.items()]
+            scripts.append(f"renderFileTable({json.dumps(files)});")
+        else:
+            scripts = [_LOADER_JS]
+            for div_id, fig in charts.items():
+                self._write_gzip_json(data_dir / f'{div_id}.json.gz', fig.to_json())
+                scripts.append(f"lazyChart('{div_id}', '{data_dir.name}/{div_id}.json.gz');")
+            self._write_gzip_json(data_dir / 'files.json.gz', json.dumps(files))
+            scripts.append(
+                f"whenVisible('file-table', () => loadJson('{data_dir.name}/files.json.gz').then(renderFileTable));"
+            )
+        
+        script = '\n        '.join(scripts)
         
         html = f"""
 <!DOCTYPE html>
@@ -90,6 +191,22 @@ class ReportGenerator:
             border-radius: 4px;
             font-size: 14px;
         }}
+        .file-table {{
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 14px;
+        }}
+        .file-table th, .file-table td {{
+            text-align: left;
+            padding: 6px 10px;
+            border-bottom: 1px solid #eee;
+        }}
+        .table-controls {{
+            display: flex;
+            gap: 10px;
+            align-items: center;
+            margin-bottom: 10px;
+        }}
     </style>
 </head>
 <body>
@@ -118,22 +235,57 @@ class ReportGenerator:
         <div id="hotspot-chart"></div>
     </div>
 
+    <div class="chart-container">
+        <h2>Directory Hotspots (click to drill down)</h2>
+        <div id="directory-chart"></div>
+    </div>
+
     <div class="chart-container">
         <h2>Commit Density (7-day rolling average)</h2>
         <div id="density-chart"></div>
     </div>
 
+    <div class="chart-container">
+        <h2>All Files</h2>
+        <div class="table-controls">
+            <input id="file-table-filter" type="search" placeholder="Filter by path">
+            <button id="file-table-prev">Previous</button>
+            <button id="file-table-next">Next</button>
+            <span id="file-table-info"></span>
+        </div>
+        <table id="file-table" class="file-table">
+            <thead><tr><th>File</th><th>Commits</th><th>Volatility</th></tr></thead>
+            <tbody id="file-table-body"></tbody>
+        </table>
+    </div>
+
     <script>
-        {charts[0]}
-        {charts[1]}
-        {charts[2]}
-        {charts[3]}
+        {_FILE_TABLE_JS}
+        {script}
     </script>
 </body>
 </html>
 """
         return html
 
+    def _write_gzip_json(self, path, payload):
+        """Write a JSON string as a gzipped data file"""
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(payload)
+
+    def _file_rows(self):
+        """Compact [file, commits, volatility] rows for the file table"""
+        return [[v['file'], v['commits'], round(v['volatility'], 4)] for v in self.metrics['file_volatility']]
+
+    def _downsample(self, data, key):
+        """Reduce a dated series to MAX_CHART_POINTS, keeping its shape"""
+        if len(data) <= MAX_CHART_POINTS:
+            return data
+        
+        xs = [datetime.fromisoformat(d['date']).timestamp() for d in data]
+        ys = [d[key] for d in data]
+        return [data[i] for i in lttb(xs, ys, MAX_CHART_POINTS)]
+
     def _render_insights(self):
         """Render insights section"""
         html = '<div class="insights"><h2>Key Findings</h2>'
@@ -142,7 +294,14 @@ class ReportGenerator:
         if self.insights['instability_periods']:
             html += '<div class="insight-section"><h3>⚠ Instability Periods</h3>'
             for period in self.insights['instability_periods'][:5]:
-                html += f'<div class="insight-item">Week {period["week"]}: {period["multiplier"]}× normal churn</div>'
+                html += f'<div class="insight-item">{period["granularity"].capitalize()} {period["period"]}: {period["multiplier"]}× normal churn</div>'
+            html += '</div>'
+        
+        # Directory/file anomalies
+        if self.insights['localized_anomalies']:
+            html += '<div class="insight-section"><h3>📈 Localized Churn Spikes</h3>'
+            for anomaly in self.insights['localized_anomalies']:
+                html += f'<div class="insight-item">{anomaly["path"]} ({anomaly["kind"]}), {anomaly["period"]}: {anomaly["multiplier"]}× its recent baseline</div>'
             html += '</div>'
         
         # Risky files
@@ -152,6 +311,14 @@ class ReportGenerator:
                 html += f'<div class="insight-item">{file["file"]} (score: {file["score"]}, {file["commits"]} commits)</div>'
             html += '</div>'
         
+        # Fix-prone files
+        if self.insights['bug_fix_correlation'].get('detected'):
+            html += '<div class="insight-section"><h3>🐞 Fix-Prone Files</h3>'
+            for file in self.insights['bug_fix_correlation']['fix_prone_files'][:5]:
+                hotspot = ', also a hotspot' if file['hotspot'] else ''
+                html += f'<div class="insight-item">{file["file"]} ({file["fix_commits"]} fix commits, {file["fix_ratio"]:.0%} of its changes{hotspot})</div>'
+            html += '</div>'
+        
         # Coupling
         if self.insights['coupling_warnings']:
             html += '<div class="insight-section"><h3>🔗 Temporal Coupling</h3>'
@@ -164,12 +331,7 @@ class ReportGenerator:
 
     def _chart_loc_trend(self):
         """Generate LOC trend chart"""
-        data = self.metrics['loc_over_time']
-        
-        # Sample data if too many points
-        if len(data) > 500:
-            step = len(data) // 500
-            data = data[::step]
+        data = self._downsample(self.metrics['loc_over_time'], 'loc')
         
         dates = [d['date'] for d in data]
         loc = [d['loc'] for d in data]
@@ -191,7 +353,7 @@ class ReportGenerator:
             margin=dict(l=0, r=0, t=0, b=0)
         )
         
-        return f"Plotly.newPlot('loc-chart', {fig.to_json()});"
+        return fig
 
     def _chart_churn(self):
         """Generate churn chart"""
@@ -221,7 +383,7 @@ class ReportGenerator:
             margin=dict(l=0, r=0, t=0, b=0)
         )
         
-        return f"Plotly.newPlot('churn-chart', {fig.to_json()});"
+        return fig
 
     def _chart_hotspots(self):
         """Generate hotspot chart"""
@@ -249,16 +411,11 @@ class ReportGenerator:
             margin=dict(l=0, r=0, t=0, b=0)
         )
         
-        return f"Plotly.newPlot('hotspot-chart', {fig.to_json()});"
+        return fig
 
     def _chart_density(self):
         """Generate commit density chart"""
-        data = self.metrics['commit_density']
-        
-        # Sample if too many points
-        if len(data) > 500:
-            step = len(data) // 500
-            data = data[::step]
+        data = self._downsample(self.metrics['commit_density'], 'density')
         
         dates = [d['date'] for d in data]
         density = [d['density'] for d in data]
@@ -280,4 +437,40 @@ class ReportGenerator:
             margin=dict(l=0, r=0, t=0, b=0)
         )
         
-        return f"Plotly.newPlot('density-chart', {fig.to_json()});"
+        return fig
+
+    def _chart_directories(self):
+        """Generate drill-down directory treemap"""
+        data = self.metrics['directory_rollups']
+        
+        ids = [d['path'] or '/' for d in data]
+        parents = ['' if d['parent'] is None else (d['parent'] or '/') for d in data]
+        labels = [d['path'].split('/')[-1] or '/' for d in data]
+        
+        fig = go.Figure()
+        fig.add_trace(go.Treemap(
+            ids=ids,
+            labels=labels,
+            parents=parents,
+            values=[d['churn'] for d in data],
+            branchvalues='total',
+            maxdepth=3,
+            marker=dict(
+                colors=[d['score'] for d in data],
+                colorscale='Reds',
+                showscale=True
+            ),
+            customdata=[[d['commits'], d['files'], d['coupling']] for d in data],
+            hovertemplate=(
+                '<b>%{id}</b><br>Churn: %{value}<br>Score: %{color:.2f}<br>'
+                'Commits: %{customdata[0]}<br>Files: %{customdata[1]}<br>'
+                'Cross-directory coupling: %{customdata[2]:.0%}<extra></extra>'
+            )
+        ))
+        
+        fig.update_layout(
+            height=600,
+            margin=dict(l=0, r=0, t=0, b=0)
+        )
+        
+        return fig
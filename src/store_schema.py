@@ -0,0 +1,176 @@
+"""Store schema - analysis database layout, indexes and migrations"""
+
+import sqlite3
+
+SCHEMA_VERSION = 1
+
+TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS commits (
+        id INTEGER PRIMARY KEY,
+        sha TEXT UNIQUE NOT NULL,
+        timestamp INTEGER,
+        author TEXT,
+        message TEXT,
+        refs BLOB,
+        parents TEXT
+    )
+    ''',
+    # timestamp and lineage_id are denormalized onto each change so metric
+    # queries never join back to commits or lineage
+    '''
+    CREATE TABLE IF NOT EXISTS file_changes (
+        id INTEGER PRIMARY KEY,
+        commit_id INTEGER REFERENCES commits(id),
+        timestamp INTEGER,
+        file_path TEXT,
+        lineage_id INTEGER,
+        lines_added INTEGER,
+        lines_deleted INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS renames (
+        commit_id INTEGER REFERENCES commits(id),
+        old_path TEXT,
+        new_path TEXT,
+        similarity INTEGER
+    )
+    ''',
+    # One row per file identity; changes carry their lineage_id, since a
+    # path can belong to different lineages at different points in history
+    '''
+    CREATE TABLE IF NOT EXISTS lineage (
+        lineage_id INTEGER PRIMARY KEY,
+        lineage_path TEXT
+    )
+    ''',
+    # Refs recorded by a multi-ref walk; bit is the position in commits.refs
+    '''
+    CREATE TABLE IF NOT EXISTS refs (
+        bit INTEGER PRIMARY KEY,
+        name TEXT UNIQUE,
+        shorthand TEXT,
+        target TEXT
+    )
+    '''
+]
+
+# Indexes over commits alone, built as soon as the metadata pass finishes
+METADATA_INDEXES = [
+    # metadata, commit_density
+    'CREATE INDEX IF NOT EXISTS idx_commits_by_time ON commits(timestamp)',
+    # commit_summary
+    'CREATE INDEX IF NOT EXISTS idx_commits_by_author ON commits(author, timestamp, parents)'
+]
+
+# Covering indexes, each shaped for the metric queries noted beside it
+INDEXES = [
+    # loc_over_time, weekly_churn, anomalies: time-ordered per-commit sums
+    'CREATE INDEX idx_changes_by_time ON file_changes(timestamp, commit_id, lineage_id, lines_added, lines_deleted)',
+    # file_stats, stability_halflife, approximate coupling: per-lineage aggregates
+    'CREATE INDEX idx_changes_by_lineage ON file_changes(lineage_id, commit_id, timestamp, lines_added, lines_deleted)',
+    # directory_rollups, temporal_coupling: files grouped by commit
+    'CREATE INDEX idx_changes_by_commit ON file_changes(commit_id, lineage_id, lines_added, lines_deleted)'
+]
+
+# Full-text index over commit messages. External content: the text stays in
+# commits and only the inverted index is stored, keyed by commits.id
+SEARCH_INDEX = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS commits_fts
+    USING fts5(message, content='commits', content_rowid='id')
+'''
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def create_schema(conn):
+    """Create any missing tables and stamp the schema version.
+
+    Indexes are built after bulk loading. Stamping up front keeps a store
+    that is still being extracted from looking like one to migrate.
+    """
+    for statement in TABLES:
+        conn.execute(statement)
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+
+def create_metadata_indexes(conn):
+    """Build the indexes over commits, including message search"""
+    for statement in METADATA_INDEXES:
+        conn.execute(statement)
+    create_search_index(conn)
+
+
+def create_change_indexes(conn):
+    """Build the indexes over file changes and lineage"""
+    for statement in INDEXES:
+        conn.execute(statement)
+
+
+def create_indexes(conn):
+    """Build every index"""
+    create_metadata_indexes(conn)
+    create_change_indexes(conn)
+
+
+def create_search_index(conn):
+    """Build the commit message index; returns False if SQLite lacks FTS5"""
+    try:
+        conn.execute(SEARCH_INDEX)
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("INSERT INTO commits_fts(commits_fts) VALUES ('rebuild')")
+    return True
+
+
+def has_search_index(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'commits_fts'").fetchone() is not None
+
+
+def migrate(conn):
+    """Upgrade an older store in place; returns True if a migration was performed.
+
+    Stores from before versioning (user_version 0) had TEXT commit keys and
+    no lineage, renames, refs, parents or message index.
+    """
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return False
+
+    print(f"   Migrating analysis store to schema v{SCHEMA_VERSION}...")
+    for table in ('commits', 'file_changes'):
+        conn.execute(f'ALTER TABLE {table} RENAME TO {table}_v0')
+    for (index,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall():
+        conn.execute(f'DROP INDEX {index}')
+
+    create_schema(conn)
+
+    # Renames were never recorded, so every path is its own lineage,
+    # numbered by first sighting in the newest-first walk like the walker does
+    conn.execute('''
+        INSERT INTO lineage (lineage_id, lineage_path)
+        SELECT ROW_NUMBER() OVER (ORDER BY MIN(id)), file_path
+        FROM file_changes_v0
+        GROUP BY file_path
+    ''')
+    conn.execute('''
+        INSERT INTO commits (sha, timestamp, author, message)
+        SELECT sha, timestamp, author, message FROM commits_v0 ORDER BY rowid
+    ''')
+    conn.execute('''
+        INSERT INTO file_changes (commit_id, timestamp, file_path, lineage_id, lines_added, lines_deleted)
+        SELECT c.id, c.timestamp, fc.file_path, l.lineage_id, fc.lines_added, fc.lines_deleted
+        FROM file_changes_v0 fc
+        JOIN commits c ON c.sha = fc.commit_sha
+        JOIN lineage l ON l.lineage_path = fc.file_path
+        ORDER BY fc.id
+    ''')
+
+    for table in ('commits', 'file_changes'):
+        conn.execute(f'DROP TABLE {table}_v0')
+
+    create_indexes(conn)
+    conn.commit()
+    return True
@@ -0,0 +1,45 @@
+"""Tests for the lazy Analysis API"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.repo_loader import RepoLoader
+from src.commit_walker import CommitWalker
+from src.analysis import Analysis
+
+
+def _analysis(tmp_path):
+    repo_path = os.path.dirname(os.path.dirname(__file__))
+    walker = CommitWalker(RepoLoader(repo_path).load())
+    walker.db_path = tmp_path / 'repo_data.db'
+    return Analysis(walker.extract_to_db())
+
+
+def test_hotspots_do_not_compute_unrelated_metrics(tmp_path):
+    analysis = _analysis(tmp_path)
+    calculator = analysis.calculator
+    calls = []
+    compute_file_stats = calculator._compute_file_stats
+    calculator._compute_file_stats = lambda *args: calls.append(args) or compute_file_stats(*args)
+
+    hotspots = analysis['hotspots']
+    assert hotspots is analysis.hotspots  # memoized
+
+    assert set(analysis.computed) == {'total_commits', 'lineage_names', 'file_stats', 'hotspots'}
+    assert 'temporal_coupling' not in analysis.computed
+    assert 'commit_density' not in analysis.computed
+
+    # Volatility reuses the shared per-file stats
+    analysis['file_volatility']
+    assert 'file_volatility' in analysis.computed
+    assert len(calls) == 1
+
+
+def test_insights_pull_only_what_they_need(tmp_path):
+    analysis = _analysis(tmp_path)
+
+    insights = analysis.insights(['risky_files'])
+    assert 'risky_files' in insights and 'coupling_warnings' not in insights
+    assert 'temporal_coupling' not in analysis.computed
@@ -0,0 +1,47 @@
+"""Tests for the streaming anomaly detector"""
+
+import sys
+import os
+import random
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.anomaly_detector import AnomalyDetector, RollingBaseline
+
+
+def test_rolling_median_and_mad_match_brute_force():
+    rng = random.Random(7)
+    baseline = RollingBaseline(window=9)
+    window = []
+    for _ in range(200):
+        value = rng.choice([rng.randint(0, 5), rng.random() * 100])
+        baseline.push(value)
+        window = (window + [value])[-9:]
+
+        median = statistics.median(window)
+        assert baseline.median() == median
+        assert abs(baseline.mad() - statistics.median([abs(x - median) for x in window])) < 1e-9
+
+
+def test_spike_judged_against_recent_baseline():
+    detector = AnomalyDetector(window=4, min_periods=4)
+    # A quiet era then a busier one: the shift is flagged until the window
+    # adapts, after which only the genuine spike stands out
+    series = [10, 12, 11, 9, 100, 110, 95, 105, 102, 400, 98]
+    flagged = [p for p, v in enumerate(series) if detector.update('repo', p, v)]
+    assert flagged == [4, 5, 9]
+
+
+def test_instability_periods_come_from_repo_anomalies():
+    from src.insight_engine import InsightEngine
+
+    # No weekly_churn: instability must be read from the repo anomaly series
+    metrics = {'anomalies': {
+        'granularity': 'month',
+        'repo': [{'path': '', 'period': '2024-03', 'value': 900, 'baseline': 100, 'score': 12.0, 'multiplier': 9.0}],
+        'directories': [],
+        'files': []
+    }}
+    periods = InsightEngine(metrics)._detect_instability()
+    assert periods == [{'period': '2024-03', 'granularity': 'month', 'churn': 900, 'multiplier': 9.0}]
@@ -0,0 +1,86 @@
+"""Tests for Arrow/Parquet export of the analysis database"""
+
+import sys
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pa = pytest.importorskip('pyarrow')
+
+from src import columnar_store, store_schema
+from src.columnar_store import ColumnarExporter, ColumnarStore
+
+YEARS = {2021: 3, 2022: 5, 2023: 2}
+
+
+def _store(path):
+    conn = sqlite3.connect(path)
+    store_schema.create_schema(conn)
+    conn.executemany('INSERT INTO lineage VALUES (?, ?)', [(1, 'a.py'), (2, 'b.py')])
+    n = 0
+    for year, count in YEARS.items():
+        for day in range(count):
+            timestamp = int(datetime(year, 6, day + 1, tzinfo=timezone.utc).timestamp())
+            # Early commits have no author, so a whole batch of that column is NULL
+            author = None if n < 4 else 'dev'
+            commit_id = conn.execute('INSERT INTO commits (sha, timestamp, author, message) VALUES (?, ?, ?, ?)',
+                                     (f'{n:040x}', timestamp, author, f'change {n}')).lastrowid
+            conn.executemany(
+                'INSERT INTO file_changes (commit_id, timestamp, file_path, lineage_id, lines_added, lines_deleted) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(commit_id, timestamp, 'a.py', 1, n, 1), (commit_id, timestamp, 'b.py', 2, 2, n)])
+            n += 1
+    store_schema.create_indexes(conn)
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_round_trip_by_year(tmp_path, monkeypatch, fmt):
+    monkeypatch.setattr(columnar_store, 'BATCH_ROWS', 2)
+    db_path = _store(tmp_path / 'repo_data.db')
+    manifest = ColumnarExporter(db_path, tmp_path / 'columnar', fmt).export()
+
+    assert manifest['tables']['commits']['partitions'] == {f'year={y}': c for y, c in YEARS.items()}
+    assert manifest['tables']['file_changes']['partitions'] == {f'year={y}': 2 * c for y, c in YEARS.items()}
+
+    store = ColumnarStore(tmp_path / 'columnar')
+    commits = store.load_table('commits')
+    assert commits.num_rows == sum(YEARS.values())
+    assert commits.schema.field('author').type == pa.string()
+    assert commits.column('author').null_count == 4
+    assert commits.column('sha').to_pylist() == [f'{n:040x}' for n in range(commits.num_rows)]
+
+    changes = store.load_table('file_changes', years=[2022], columns=['lineage_path', 'lines_added'])
+    assert changes.column_names == ['lineage_path', 'lines_added']
+    assert changes.num_rows == 2 * YEARS[2022]
+
+    metrics = store.load_table('file_metrics').to_pylist()
+    assert [(m['lineage_path'], m['commits']) for m in metrics] == [('a.py', 10), ('b.py', 10)]
+    assert metrics[0]['volatility'] == 1.0
+
+
+def test_export_migrates_store_from_before_lineage(tmp_path):
+    db_path = tmp_path / 'repo_data.db'
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE commits (sha TEXT PRIMARY KEY, timestamp INTEGER, author TEXT, message TEXT);
+        CREATE TABLE file_changes (id INTEGER PRIMARY KEY AUTOINCREMENT, commit_sha TEXT, file_path TEXT,
+                                   lines_added INTEGER, lines_deleted INTEGER);
+    ''')
+    timestamp = int(datetime(2022, 6, 1, tzinfo=timezone.utc).timestamp())
+    conn.execute('INSERT INTO commits VALUES (?, ?, ?, ?)', ('a' * 40, timestamp, 'dev', 'first'))
+    conn.executemany('INSERT INTO file_changes (commit_sha, file_path, lines_added, lines_deleted) VALUES (?, ?, ?, ?)',
+                     [('a' * 40, 'a.py', 3, 0), ('a' * 40, 'b.py', 1, 0)])
+    conn.commit()
+    conn.close()
+
+    manifest = ColumnarExporter(db_path, tmp_path / 'columnar').export()
+    assert manifest['tables']['file_changes']['partitions'] == {'year=2022': 2}
+    metrics = ColumnarStore(tmp_path / 'columnar').load_table('file_metrics').to_pylist()
+    assert sorted(m['lineage_path'] for m in metrics) == ['a.py', 'b.py']
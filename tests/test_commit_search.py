@@ -0,0 +1,101 @@
+"""Tests for commit message search"""
+
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.commit_search import CommitSearch, FIX_QUERY
+from src import store_schema
+
+COMMITS = [
+    ('Add parser', [('parser.py', 100, 0)]),
+    ('Fix crash in parser (INC-4821)', [('parser.py', 3, 1), ('tests.py', 10, 0)]),
+    ('Refactor lexer', [('lexer.py', 40, 20)]),
+    ('hotfix: parser regression', [('parser.py', 2, 2)]),
+    ('Prefix matching for fixtures', [('tests.py', 5, 0)])
+]
+
+
+def _store():
+    conn = sqlite3.connect(':memory:')
+    store_schema.create_schema(conn)
+    paths = sorted({path for _, changes in COMMITS for path, _, _ in changes})
+    lineage_ids = {path: i + 1 for i, path in enumerate(paths)}
+    conn.executemany('INSERT INTO lineage VALUES (?, ?)', [(i, p) for p, i in lineage_ids.items()])
+    for i, (message, changes) in enumerate(COMMITS):
+        commit_id = conn.execute('INSERT INTO commits (sha, timestamp, author, message) VALUES (?, ?, ?, ?)',
+                                 (f'{i:040x}', 1700000000 + i * 86400, 'dev', message)).lastrowid
+        conn.executemany(
+            'INSERT INTO file_changes (commit_id, timestamp, file_path, lineage_id, lines_added, lines_deleted) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(commit_id, 1700000000 + i * 86400, path, lineage_ids[path], added, deleted)
+             for path, added, deleted in changes])
+    store_schema.create_indexes(conn)
+    return conn
+
+
+def _results(search):
+    return {
+        'fixes': sorted(search.commit_ids(FIX_QUERY)),
+        'incident': [c['message'] for c in search.search('INC-4821')],
+        'phrase': sorted(search.commit_ids('"parser regression" OR lexer')),
+        'prefix': sorted(search.commit_ids('fixture*')),
+        'operator': sorted(search.commit_ids('INC-4821 OR lexer')),
+        'negated': sorted(search.commit_ids('parser NOT INC-4821')),
+        'summary': search.summary('parser')
+    }
+
+
+def test_search_returns_commits_with_files_and_churn():
+    search = CommitSearch(conn=_store())
+    assert search.full_text
+
+    results = _results(search)
+    assert results['fixes'] == [2, 4]
+    assert results['incident'] == ['Fix crash in parser (INC-4821)']
+    assert results['phrase'] == [3, 4]
+    assert results['prefix'] == [5]
+    assert results['operator'] == [2, 3]
+    assert results['negated'] == [1, 4]
+
+    summary = results['summary']
+    assert summary['commits'] == 3
+    assert summary['files_touched'] == 2
+    assert summary['top_files'][0] == {'file': 'parser.py', 'commits': 3, 'churn': 108}
+
+    [match] = search.search('crash')
+    assert match['churn'] == 14
+    assert {f['file'] for f in match['files']} == {'parser.py', 'tests.py'}
+
+
+def test_fallback_without_full_text_index_matches():
+    conn = _store()
+    expected = _results(CommitSearch(conn=conn))
+
+    conn.execute('DROP TABLE commits_fts')
+    search = CommitSearch(conn=conn)
+    assert not search.full_text
+    assert _results(search) == expected
+
+
+def test_unversioned_store_migrated_before_search(tmp_path):
+    db_path = tmp_path / 'repo_data_v0.db'
+    old = sqlite3.connect(db_path)
+    old.executescript('''
+        CREATE TABLE commits (sha TEXT PRIMARY KEY, timestamp INTEGER, author TEXT, message TEXT);
+        CREATE TABLE file_changes (id INTEGER PRIMARY KEY AUTOINCREMENT, commit_sha TEXT, file_path TEXT,
+                                   lines_added INTEGER, lines_deleted INTEGER);
+    ''')
+    for i, (message, changes) in enumerate(COMMITS):
+        old.execute('INSERT INTO commits VALUES (?, ?, ?, ?)', (f'{i:040x}', 1700000000 + i * 86400, 'dev', message))
+        old.executemany('INSERT INTO file_changes (commit_sha, file_path, lines_added, lines_deleted) '
+                        'VALUES (?, ?, ?, ?)', [(f'{i:040x}', path, added, deleted) for path, added, deleted in changes])
+    old.commit()
+    old.close()
+
+    search = CommitSearch(db_path)
+    assert store_schema.schema_version(search.conn) == store_schema.SCHEMA_VERSION
+    assert [c['message'] for c in search.search('INC-4821')] == ['Fix crash in parser (INC-4821)']
+    assert search.summary('parser')['top_files'][0]['file'] == 'parser.py'
@@ -0,0 +1,54 @@
+"""Tests for the two-pass commit walker and commit-graph support"""
+
+import sys
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pygit2
+from src.repo_loader import RepoLoader
+from src.commit_walker import CommitWalker
+from src.metrics_calculator import MetricsCalculator
+
+
+def test_commit_metrics_available_before_diff_pass(tmp_path):
+    repo_path = os.path.dirname(os.path.dirname(__file__))
+    walker = CommitWalker(RepoLoader(repo_path).load())
+    walker.db_path = tmp_path / 'repo_data.db'
+    walker.extract_metadata()
+
+    # A reader opened after the walk keeps working while diffs are written
+    early = MetricsCalculator(walker.db_path, read_only=True)
+    assert early.conn.execute('SELECT COUNT(*) FROM file_changes').fetchone()[0] == 0
+    before = {name: early.get(name) for name in MetricsCalculator.COMMIT_LEVEL}
+    assert before['commit_summary']['commits'] > 0
+
+    walker.extract_diffs()
+    assert early.conn.execute('SELECT COUNT(*) FROM file_changes').fetchone()[0] > 0
+    early.conn.close()
+
+    after = MetricsCalculator(walker.db_path, read_only=True)
+    assert {name: after.get(name) for name in MetricsCalculator.COMMIT_LEVEL} == before
+
+    # Parents are recorded; only root commits have none
+    roots = after.conn.execute("SELECT COUNT(*) FROM commits WHERE parents = ''").fetchone()[0]
+    assert roots >= 1
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='needs the git executable')
+def test_commit_graph_written_on_request(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / 'repo'))
+    signature = pygit2.Signature('dev', 'dev@example.com', 1700000000, 0)
+    tree = repo.TreeBuilder().write()
+    parent = repo.create_commit('refs/heads/main', signature, signature, 'first', tree, [])
+    repo.create_commit('refs/heads/main', signature, signature, 'second', tree, [parent])
+    repo.set_head('refs/heads/main')
+
+    assert not RepoLoader.has_commit_graph(RepoLoader(str(tmp_path / 'repo')).load())
+    loaded = RepoLoader(str(tmp_path / 'repo'), write_commit_graph=True).load()
+    assert RepoLoader.has_commit_graph(loaded)
+    assert [c.message for c in loaded.walk(loaded.head.target, pygit2.GIT_SORT_TOPOLOGICAL)] == ['second', 'first']
@@ -0,0 +1,31 @@
+"""Tests for hierarchical directory rollups"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.directory_tree import DirectoryTree
+
+
+def test_rollups_count_each_commit_once_per_directory():
+    rows = [
+        (1, 'src/a.py', 10),
+        (1, 'src/b.py', 5),
+        (2, 'src/a.py', 1),
+        (2, 'docs/readme.md', 4),
+    ]
+    tree = DirectoryTree.build(rows, total_commits=2)
+
+    src = tree.node('src')
+    assert src['commits'] == 2
+    assert src['churn'] == 16
+    assert src['files'] == 2
+    # Only commit 2 also touched files outside src/
+    assert src['coupling'] == 0.5
+
+    root = tree.node('')
+    assert root['commits'] == 2 and root['churn'] == 20 and root['coupling'] == 0
+
+    assert [n['path'] for n in tree.at_depth(1)] == ['src', 'docs']
+    assert {n['path'] for n in tree.children('')} == {'src', 'docs'}
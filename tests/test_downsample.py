@@ -0,0 +1,24 @@
+"""Tests for LTTB downsampling"""
+
+import sys
+import os
+import math
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.downsample import lttb
+
+
+def test_lttb_keeps_threshold_points_and_spike():
+    xs = list(range(5000))
+    ys = [math.sin(x / 50) for x in xs]
+    ys[3217] = 40
+
+    indices = lttb(xs, ys, 500)
+    assert len(indices) == 500
+    assert all(a < b for a, b in zip(indices, indices[1:]))
+    assert indices[0] == 0 and indices[-1] == len(xs) - 1
+    assert 3217 in indices
+
+    # Short series are returned whole
+    assert lttb(xs[:10], ys[:10], 500) == list(range(10))
@@ -0,0 +1,122 @@
+"""Tests for gitignore-style ingest filtering"""
+
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pygit2
+from src.ingest_filter import IngestFilter
+from src.commit_walker import CommitWalker
+
+
+def test_gitignore_pattern_semantics():
+    ingest_filter = IngestFilter(['vendor/', '*.min.js', '/build', 'docs/**/*.png', '!docs/keep.png'])
+
+    assert ingest_filter.is_ignored('vendor/lib.c')
+    assert ingest_filter.is_ignored('pkg/vendor/lib.c')
+    assert not ingest_filter.is_ignored('vendored.py')
+    assert ingest_filter.is_ignored('static/app.min.js')
+    assert ingest_filter.is_ignored('build/out.o')
+    assert not ingest_filter.is_ignored('src/build/rules.py')  # anchored
+    assert ingest_filter.is_ignored('docs/img/a/b.png')
+    assert not ingest_filter.is_ignored('docs/keep.png')       # negated
+    assert not ingest_filter.is_ignored('src/main.py')
+
+
+def _repo(path, commits):
+    """Repo whose history is one commit per {path: content} snapshot"""
+    repo = pygit2.init_repository(str(path))
+    signature = pygit2.Signature('dev', 'dev@example.com', 1700000000, 0)
+    parents = []
+    for n, files in enumerate(commits):
+        index = pygit2.Index()
+        for file_path, content in files.items():
+            index.add(pygit2.IndexEntry(file_path, repo.create_blob(content), pygit2.GIT_FILEMODE_BLOB))
+        tree = index.write_tree(repo)
+        parents = [repo.create_commit('refs/heads/main', signature, signature, f'commit {n}', tree, parents)]
+    repo.set_head('refs/heads/main')
+    return repo
+
+
+GITATTRIBUTES = b'''# generated and vendored code
+gen/** linguist-generated
+gen/handwritten.py -linguist-generated
+third/** linguist-vendored=true
+third/ours.c linguist-vendored=false
+*.py diff=python
+'''
+
+
+def test_gitattributes_markers_and_unsetting(tmp_path):
+    repo = _repo(tmp_path / 'repo', [{'.gitattributes': GITATTRIBUTES}])
+    ingest_filter = IngestFilter.for_repo(repo, use_defaults=False)
+
+    assert ingest_filter.is_ignored('gen/parser_tab.py')
+    assert not ingest_filter.is_ignored('gen/handwritten.py')  # -attr
+    assert ingest_filter.is_ignored('third/lib/zlib.c')
+    assert not ingest_filter.is_ignored('third/ours.c')        # attr=false
+    assert not ingest_filter.is_ignored('src/main.py')         # unrelated attribute
+
+
+def test_is_oversized_checks_both_sides(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / 'repo'))
+    small = repo.create_blob(b'x' * 100)
+    large = repo.create_blob(b'x' * 101)
+    ingest_filter = IngestFilter(max_blob_size=100)
+
+    assert not ingest_filter.is_oversized(repo.odb, small, small)
+    assert ingest_filter.is_oversized(repo.odb, small, large)
+    assert ingest_filter.is_oversized(repo.odb, pygit2.Oid(hex='0' * 40), large)  # added file
+    assert not IngestFilter(max_blob_size=0).is_oversized(repo.odb, large)
+
+
+def test_filtered_paths_never_reach_the_store(tmp_path):
+    first = {
+        '.gitattributes': GITATTRIBUTES,
+        'gen/parser_tab.py': b'table = 1\n',
+        'gen/handwritten.py': b'def f():\n    pass\n',
+        'package-lock.json': b'{}\n',
+        'assets/big.bin': b'a\n' * 200,
+        'src/app.py': b'print(1)\n'
+    }
+    second = dict(first, **{
+        'gen/parser_tab.py': b'table = 2\n',
+        'package-lock.json': b'{"a": 1}\n',
+        'assets/big.bin': b'b\n' * 200,
+        'src/app.py': b'print(2)\n'
+    })
+    repo = _repo(tmp_path / 'repo', [first, second])
+
+    walker = CommitWalker(repo, ingest_filter=IngestFilter.for_repo(repo, max_blob_size=300))
+    walker.db_path = tmp_path / 'repo_data.db'
+    conn = sqlite3.connect(walker.extract_to_db())
+    stored = {path for (path,) in conn.execute('SELECT file_path FROM file_changes')}
+    conn.close()
+
+    assert stored == {'.gitattributes', 'gen/handwritten.py', 'src/app.py'}
+    assert walker.skipped == {'ignored': 4, 'oversized': 2}
+
+
+def test_submodule_changes_are_not_size_checked(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / 'repo'))
+    signature = pygit2.Signature('dev', 'dev@example.com', 1700000000, 0)
+    parents = []
+    # Gitlinks point at commits of the submodule's repository, absent from this one
+    for n, gitlink in enumerate(['1' * 40, '2' * 40, '3' * 40]):
+        index = pygit2.Index()
+        index.add(pygit2.IndexEntry('.gitmodules', repo.create_blob(b'[submodule "lib"]\n\tpath = lib\n'),
+                                    pygit2.GIT_FILEMODE_BLOB))
+        index.add(pygit2.IndexEntry('lib', pygit2.Oid(hex=gitlink), pygit2.GIT_FILEMODE_COMMIT))
+        index.add(pygit2.IndexEntry('app.py', repo.create_blob(f'v = {n}\n'.encode()), pygit2.GIT_FILEMODE_BLOB))
+        tree = index.write_tree(repo)
+        parents = [repo.create_commit('refs/heads/main', signature, signature, f'bump {n}', tree, parents)]
+    repo.set_head('refs/heads/main')
+
+    walker = CommitWalker(repo, ingest_filter=IngestFilter.for_repo(repo, max_blob_size=100))
+    walker.db_path = tmp_path / 'repo_data.db'
+    conn = sqlite3.connect(walker.extract_to_db())
+    assert conn.execute("SELECT COUNT(*) FROM file_changes WHERE file_path = 'app.py'").fetchone()[0] == 3
+    conn.close()
+    assert walker.skipped['oversized'] == 0
@@ -0,0 +1,81 @@
+"""Tests for the rename lineage index"""
+
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pygit2
+from src.lineage import LineageIndex
+from src.commit_walker import CommitWalker
+from src.ingest_filter import IngestFilter
+
+
+def test_rename_chain_shares_lineage():
+    """Files moved several times resolve to their newest path"""
+    index = LineageIndex()
+    # Walked newest-first: a.py -> b.py -> c.py
+    c = index.lineage_of('c.py')
+    index.rebind([('b.py', c)])
+    assert index.lineage_of('b.py') == c
+    index.rebind([('a.py', c)])
+    assert index.lineage_of('a.py') == c
+    assert index.lineage_of('unrelated.py') != c
+    assert index.display_path(c) == 'c.py'
+    assert list(index.rows()) == [(1, 'c.py'), (2, 'unrelated.py')]
+
+
+def test_swapped_paths_rebind_after_the_commit():
+    index = LineageIndex()
+    a, b = index.lineage_of('a.py'), index.lineage_of('b.py')
+    # One commit renamed a.py -> b.py and b.py -> a.py
+    index.rebind([('a.py', b), ('b.py', a)])
+    assert index.lineage_of('a.py') == b
+    assert index.lineage_of('b.py') == a
+
+
+def test_rename_stats_cached_by_blob_pair():
+    index = LineageIndex()
+    assert index.cached_rename('old', 'new') is None
+    index.cache_rename('old', 'new', (3, 1))
+    assert index.cached_rename('old', 'new') == (3, 1)
+
+
+def test_path_reused_after_move_gets_its_own_lineage(tmp_path):
+    """README.md moved to docs.md, then a new README.md is created and edited"""
+    repo = pygit2.init_repository(str(tmp_path / 'repo'))
+    signature = pygit2.Signature('dev', 'dev@example.com', 1700000000, 0)
+    original = b''.join(b'original line %d\n' % i for i in range(20))
+    history = [
+        {'README.md': original},
+        {'docs.md': original},
+        {'docs.md': original, 'README.md': b'new readme\n'},
+        {'docs.md': original, 'README.md': b'new readme\nedit 1\n'},
+        {'docs.md': original, 'README.md': b'new readme\nedit 1\nedit 2\n'},
+        {'docs.md': original, 'README.md': b'new readme\nedit 1\nedit 2\nedit 3\n'}
+    ]
+    parents = []
+    for i, files in enumerate(history):
+        builder = repo.TreeBuilder()
+        for path, content in files.items():
+            builder.insert(path, repo.create_blob(content), pygit2.GIT_FILEMODE_BLOB)
+        parents = [repo.create_commit('refs/heads/main', signature, signature, f'c{i}', builder.write(), parents)]
+    repo.set_head('refs/heads/main')
+
+    walker = CommitWalker(repo, ingest_filter=IngestFilter())
+    walker.db_path = tmp_path / 'repo_data.db'
+    conn = sqlite3.connect(walker.extract_to_db())
+    rows = conn.execute('''
+        SELECT c.message, fc.file_path, l.lineage_path
+        FROM file_changes fc
+        JOIN commits c ON c.id = fc.commit_id
+        JOIN lineage l ON l.lineage_id = fc.lineage_id
+        ORDER BY c.timestamp, c.id DESC
+    ''').fetchall()
+
+    lineage_by_commit = {(message, path): lineage_path for message, path, lineage_path in rows}
+    assert lineage_by_commit[('c0', 'README.md')] == 'docs.md'
+    assert lineage_by_commit[('c1', 'docs.md')] == 'docs.md'
+    for message in ('c2', 'c3', 'c4', 'c5'):
+        assert lineage_by_commit[(message, 'README.md')] == 'README.md'
@@ -0,0 +1,25 @@
+"""Tests for MetricsCalculator execution modes"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.repo_loader import RepoLoader
+from src.commit_walker import CommitWalker
+from src.metrics_calculator import MetricsCalculator
+
+
+def test_parallel_matches_sequential(tmp_path, monkeypatch):
+    repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # compute_all() saves data/metrics.json relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    walker = CommitWalker(RepoLoader(repo_path).load())
+    walker.db_path = tmp_path / 'repo_data.db'
+    db_path = walker.extract_to_db()
+
+    sequential = MetricsCalculator(db_path).compute_all()
+    parallel = MetricsCalculator(db_path).compute_all(workers=4)
+
+    assert parallel == sequential
@@ -0,0 +1,95 @@
+"""Tests for MinHash/LSH approximate coupling"""
+
+import sys
+import os
+import random
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.minhash import MinHashCoupling
+from src.metrics_calculator import MetricsCalculator
+from src import store_schema
+
+
+def _chunks(file_sets):
+    files, commits = [], []
+    for file_index, commit_set in enumerate(file_sets):
+        files += [file_index] * len(commit_set)
+        commits += sorted(commit_set)
+    yield files, commits
+
+
+def test_estimates_within_configured_error():
+    rng = random.Random(7)
+    error = 0.1
+    minhash = MinHashCoupling(similarity=0.3, error=error)
+
+    # Pairs of commit sets with a range of true Jaccard similarities
+    file_sets = []
+    for shared in (0, 20, 50, 100, 150, 200):
+        commits = rng.sample(range(100000), 400 - shared)
+        file_sets.append(set(commits[:200]))
+        file_sets.append(set(commits[:shared]) | set(commits[200:]))
+
+    sigs, counts = minhash.signatures(_chunks(file_sets), len(file_sets))
+    assert list(counts) == [len(s) for s in file_sets]
+    for f1 in range(0, len(file_sets), 2):
+        a, b = file_sets[f1], file_sets[f1 + 1]
+        exact = len(a & b) / len(a | b)
+        # Three standard errors
+        assert abs(minhash.estimate(sigs, f1, f1 + 1) - exact) <= 3 * error
+
+
+def _store(path, commits):
+    conn = sqlite3.connect(path)
+    store_schema.create_schema(conn)
+    names = sorted({name for files in commits for name in files})
+    ids = {name: i + 1 for i, name in enumerate(names)}
+    conn.executemany('INSERT INTO lineage VALUES (?, ?)', [(i, name) for name, i in ids.items()])
+    for n, files in enumerate(commits):
+        commit_id = conn.execute('INSERT INTO commits (sha, timestamp, author, message) VALUES (?, ?, ?, ?)',
+                                 (f'{n:040x}', 1700000000 + n * 3600, 'dev', f'c{n}')).lastrowid
+        conn.executemany('INSERT INTO file_changes (commit_id, timestamp, file_path, lineage_id, lines_added, '
+                         'lines_deleted) VALUES (?, ?, ?, ?, 1, 0)',
+                         [(commit_id, 1700000000 + n * 3600, name, ids[name]) for name in files])
+    store_schema.create_indexes(conn)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _pairs(coupling):
+    return {(pair['file1'], pair['file2']) for pair in coupling}
+
+
+def test_approximate_recovers_exact_pairs(tmp_path):
+    rng = random.Random(3)
+    commits = []
+    for n in range(400):
+        files = set()
+        if n % 4 == 0:
+            files |= {'api.py', 'api_test.py'}
+        if n % 5 == 0:
+            files |= {'model.py', 'schema.sql'} if rng.random() < 0.8 else {'model.py'}
+        if n % 7 == 0:
+            files.add('core.py')
+            # A small file that only ever changes with the much busier core.py
+            if n % 70 == 49:
+                files.add('core_config.py')
+        if not files:
+            files = set(rng.sample([f'noise{i}.py' for i in range(200)], 2))
+        commits.append(files)
+    db_path = _store(tmp_path / 'coupling.db', commits)
+
+    exact = _pairs(MetricsCalculator(db_path).get('temporal_coupling'))
+    assert {('api.py', 'api_test.py'), ('model.py', 'schema.sql'), ('core.py', 'core_config.py')} <= exact
+
+    approx = _pairs(MetricsCalculator(db_path, approximate_coupling=True, coupling_error=0.05)
+                    .get('temporal_coupling'))
+    assert exact - {('core.py', 'core_config.py')} <= approx
+
+    # core_config.py has 1/10 of core.py's commits: Jaccard ~0.1, coupling 1.0
+    approx_low = _pairs(MetricsCalculator(db_path, approximate_coupling=True, coupling_similarity=0.1,
+                                          coupling_error=0.05).get('temporal_coupling'))
+    assert exact <= approx_low
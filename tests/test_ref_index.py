@@ -0,0 +1,96 @@
+"""Tests for multi-ref walking and per-ref stores"""
+
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pygit2
+from src.commit_walker import CommitWalker
+from src.ingest_filter import IngestFilter
+from src.ref_index import RefIndex, extract_ref_store, mask_has_bit, match_ref
+
+
+def _commit(repo, ref, message, files, parents):
+    builder = repo.TreeBuilder()
+    for path, content in files.items():
+        builder.insert(path, repo.create_blob(content), pygit2.GIT_FILEMODE_BLOB)
+    signature = pygit2.Signature('dev', 'dev@example.com', 1700000000 + len(message), 0)
+    return repo.create_commit(ref, signature, signature, message, builder.write(), parents)
+
+
+def _branchy_repo(path):
+    """main: base - two - three (tag v1); feature forks at two: feat1 - feat2"""
+    repo = pygit2.init_repository(str(path))
+    base = _commit(repo, 'refs/heads/main', 'base', {'a.py': b'a\n'}, [])
+    two = _commit(repo, 'refs/heads/main', 'two', {'a.py': b'a\nb\n'}, [base])
+    three = _commit(repo, 'refs/heads/main', 'three', {'a.py': b'a\nb\nc\n'}, [two])
+    feat1 = _commit(repo, 'refs/heads/feature', 'feat1', {'a.py': b'a\nb\n', 'f.py': b'x\n'}, [two])
+    _commit(repo, 'refs/heads/feature', 'feat2', {'a.py': b'a\nb\n', 'f.py': b'x\ny\n'}, [feat1])
+    repo.references.create('refs/tags/v1', three)
+    repo.set_head('refs/heads/main')
+    return repo
+
+
+def test_shared_history_walked_once_with_reachability(tmp_path):
+    repo = _branchy_repo(tmp_path / 'repo')
+    ref_index = RefIndex.resolve(repo)
+    assert [name for name, _, _ in ref_index.refs] == ['refs/heads/feature', 'refs/heads/main', 'refs/tags/v1']
+
+    walker = CommitWalker(repo, ingest_filter=IngestFilter(), ref_index=ref_index)
+    walker.db_path = tmp_path / 'repo_data.db'
+    db_path = walker.extract_to_db()
+
+    conn = sqlite3.connect(db_path)
+    reachable = {message: {bit for bit in range(3) if mask_has_bit(refs, bit)}
+                 for message, refs in conn.execute('SELECT message, refs FROM commits')}
+    assert reachable == {
+        'base': {0, 1, 2}, 'two': {0, 1, 2}, 'three': {1, 2}, 'feat1': {0}, 'feat2': {0}
+    }
+
+    feature = sqlite3.connect(extract_ref_store(db_path, 'feature'))
+    assert sorted(m for (m,) in feature.execute('SELECT message FROM commits')) == ['base', 'feat1', 'feat2', 'two']
+    assert feature.execute("SELECT SUM(lines_added) FROM file_changes WHERE file_path = 'f.py'").fetchone()[0] == 2
+
+
+def test_patterns_select_refs(tmp_path):
+    repo = _branchy_repo(tmp_path / 'repo')
+    assert [s for _, s, _ in RefIndex.resolve(repo, ['refs/tags/*']).refs] == ['v1']
+    assert [s for _, s, _ in RefIndex.resolve(repo, ['main', 'feat*']).refs] == ['feature', 'main']
+
+
+def test_patterns_match_whole_segments():
+    assert match_ref('release/1.0', 'release/*')
+    assert not match_ref('release/a/b', 'release/*')
+    assert match_ref('release/a/b', 'release/**')
+    assert match_ref('refs/heads/release/a/b', 'refs/**/b')
+    assert not match_ref('Release/1.0', 'release/*')    # case-sensitive
+    assert not match_ref('release', 'release/*')
+
+
+def _lineages(conn):
+    return dict(conn.execute('''
+        SELECT l.lineage_path, COUNT(*) FROM file_changes fc
+        JOIN lineage l ON l.lineage_id = fc.lineage_id
+        GROUP BY l.lineage_path
+    '''))
+
+
+def test_rename_on_one_branch_stays_out_of_the_other(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / 'repo'))
+    text = b''.join(b'line %d\n' % i for i in range(20))
+    base = _commit(repo, 'refs/heads/main', 'base', {'a.py': text}, [])
+    _commit(repo, 'refs/heads/main', 'main edit', {'a.py': text + b'main\n'}, [base])
+    moved = _commit(repo, 'refs/heads/feature', 'move', {'renamed.py': text}, [base])
+    _commit(repo, 'refs/heads/feature', 'feature edit', {'renamed.py': text + b'feature\n'}, [moved])
+    repo.set_head('refs/heads/main')
+
+    walker = CommitWalker(repo, ingest_filter=IngestFilter(), ref_index=RefIndex.resolve(repo))
+    walker.db_path = tmp_path / 'repo_data.db'
+    db_path = walker.extract_to_db()
+
+    main = sqlite3.connect(extract_ref_store(db_path, 'main'))
+    assert _lineages(main) == {'a.py': 2}
+    feature = sqlite3.connect(extract_ref_store(db_path, 'feature'))
+    assert _lineages(feature) == {'renamed.py': 3}
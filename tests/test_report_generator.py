@@ -0,0 +1,40 @@
+"""Tests for report generation with split data files"""
+
+import sys
+import os
+import gzip
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.repo_loader import RepoLoader
+from src.commit_walker import CommitWalker
+from src.metrics_calculator import MetricsCalculator
+from src.insight_engine import InsightEngine
+from src.report_generator import ReportGenerator
+
+
+def test_split_data_files_written_and_referenced(tmp_path, monkeypatch):
+    repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # compute_all() saves data/metrics.json relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    walker = CommitWalker(RepoLoader(repo_path).load())
+    walker.db_path = tmp_path / 'repo_data.db'
+    metrics = MetricsCalculator(walker.extract_to_db()).compute_all()
+    insights = InsightEngine(metrics).analyze()
+
+    output_path = tmp_path / 'out' / 'report.html'
+    ReportGenerator(metrics, insights, split_data=True).generate(output_path)
+
+    html = output_path.read_text(encoding='utf-8')
+    data_files = sorted((tmp_path / 'out' / 'report_data').glob('*.json.gz'))
+    assert {f.name for f in data_files} == {'loc-chart.json.gz', 'churn-chart.json.gz', 'hotspot-chart.json.gz',
+                                            'density-chart.json.gz', 'directory-chart.json.gz', 'files.json.gz'}
+    for data_file in data_files:
+        assert f"'report_data/{data_file.name}'" in html
+        with gzip.open(data_file, 'rt', encoding='utf-8') as f:
+            json.load(f)
+
+    # Nothing is inlined: the page only carries the loader
+    assert 'Plotly.newPlot(\'' not in html
@@ -0,0 +1,84 @@
+"""Tests for the analysis store schema, indexes and migration"""
+
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.repo_loader import RepoLoader
+from src.commit_walker import CommitWalker
+from src.metrics_calculator import MetricsCalculator
+from src import store_schema
+
+
+def _db_path(tmp_path):
+    repo_path = os.path.dirname(os.path.dirname(__file__))
+    walker = CommitWalker(RepoLoader(repo_path).load())
+    walker.db_path = tmp_path / 'repo_data.db'
+    return walker.extract_to_db()
+
+
+def _metric_queries(calculator):
+    queries = []
+    calculator.conn.set_trace_callback(queries.append)
+    for name in calculator.METRICS:
+        calculator.get(name)
+    calculator.conn.set_trace_callback(None)
+    return [q for q in queries if q.strip().upper().startswith('SELECT')]
+
+
+def test_metric_queries_use_covering_indexes(tmp_path):
+    db_path = _db_path(tmp_path)
+    for approximate in (False, True):
+        calculator = MetricsCalculator(db_path, approximate_coupling=approximate)
+        queries = _metric_queries(calculator)
+        assert queries
+
+        for query in queries:
+            plan = [row[3] for row in calculator.conn.execute('EXPLAIN QUERY PLAN ' + query)]
+            for step in plan:
+                # No table scans or whole-result sorts; a per-group
+                # count(DISTINCT) set, the message index (with its own
+                # shadow tables) and the lineage table, keyed by lineage_id
+                # and so its own covering index, are fine
+                internal = 'sqlite_master' in step or 'commits_fts_' in step or step == 'SCAN lineage'
+                if step.startswith(('SCAN', 'SEARCH')) and not internal:
+                    assert 'USING COVERING INDEX' in step or 'VIRTUAL TABLE' in step, (query, plan)
+                assert 'TEMP B-TREE FOR GROUP BY' not in step, (query, plan)
+                assert 'TEMP B-TREE FOR ORDER BY' not in step, (query, plan)
+
+
+def test_migrates_unversioned_store(tmp_path):
+    db_path = _db_path(tmp_path)
+    calculator = MetricsCalculator(db_path)
+    expected = {name: calculator.get(name) for name in calculator.METRICS}
+
+    # Rebuild the same data in the layout of stores from before versioning
+    # (TEXT commit keys, no lineage); this history has no renames or merges
+    current = sqlite3.connect(db_path)
+    old_path = tmp_path / 'repo_data_v0.db'
+    old = sqlite3.connect(old_path)
+    old.executescript('''
+        CREATE TABLE commits (sha TEXT PRIMARY KEY, timestamp INTEGER, author TEXT, message TEXT);
+        CREATE TABLE file_changes (id INTEGER PRIMARY KEY AUTOINCREMENT, commit_sha TEXT, file_path TEXT,
+                                   lines_added INTEGER, lines_deleted INTEGER,
+                                   FOREIGN KEY (commit_sha) REFERENCES commits(sha));
+        CREATE INDEX idx_file_path ON file_changes(file_path);
+        CREATE INDEX idx_commit_sha ON file_changes(commit_sha);
+    ''')
+    old.executemany('INSERT INTO commits VALUES (?, ?, ?, ?)',
+                    current.execute('SELECT sha, timestamp, author, message FROM commits ORDER BY id'))
+    old.executemany('INSERT INTO file_changes (commit_sha, file_path, lines_added, lines_deleted) VALUES (?, ?, ?, ?)',
+                    current.execute('''SELECT c.sha, fc.file_path, fc.lines_added, fc.lines_deleted
+                                      FROM file_changes fc JOIN commits c ON c.id = fc.commit_id ORDER BY fc.id'''))
+    old.commit()
+
+    assert store_schema.migrate(old)
+    assert store_schema.schema_version(old) == store_schema.SCHEMA_VERSION
+    assert not store_schema.migrate(old)
+    old.close()
+
+    calculator = MetricsCalculator(old_path)
+    migrated = {name: calculator.get(name) for name in calculator.METRICS}
+    assert migrated == expected